@@ -1,20 +1,29 @@
 import { NextRequest, NextResponse } from 'next/server'
 
+const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:5000'
+
+// Forwards to the Flask backend, which resets the conversation's unread count
+// and marks the messages read for the user in the Authorization header
 export async function POST(
   request: NextRequest,
   { params }: { params: Promise<{ userId: string }> }
 ) {
   try {
     const { userId } = await params
-    
-    // Simulate API delay
-    await new Promise(resolve => setTimeout(resolve, 200))
+    const authorization = request.headers.get('authorization')
+    if (!authorization) {
+      return NextResponse.json({ message: 'Token is missing' }, { status: 401 })
+    }
 
-    // In a real application, you would update the database to mark messages as read
-    const userIdNum = parseInt(userId)
+    const response = await fetch(`${API_URL}/api/chat/mark-read/${encodeURIComponent(userId)}`, {
+      method: 'POST',
+      headers: { Authorization: authorization },
+      cache: 'no-store',
+    })
+    const data = await response.json()
 
-    return NextResponse.json({ success: true, userId: userIdNum })
+    return NextResponse.json(data, { status: response.status })
   } catch (error) {
     return NextResponse.json({ error: 'Failed to mark messages as read' }, { status: 500 })
   }
-} 
\ No newline at end of file
+}
@@ -0,0 +1,159 @@
+# A multi-GB resumable upload through gunicorn: start the session, PUT the
+# chunks from several client threads at once, then complete it and poll the
+# session while the server hashes the whole file in the background. Reports
+# throughput for the chunks and the verification, how long the complete
+# request itself took, and the resident memory of every worker before the
+# upload and at its peak, read from /proc, which must stay flat whatever the
+# file size.
+# The uploaded file is deleted from backend/uploads afterwards.
+#
+#   cd backend
+#   python benchmarks/chunked_upload.py
+#   python benchmarks/chunked_upload.py --size-gb 8 --chunk-mb 16 --parallel 8 --workers 4
+import argparse
+import hashlib
+import http.client
+import os
+import queue
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import jwt
+
+from common import BACKEND_DIR, HOST, call, child_pids, free_port, import_app, rss_bytes, start_server, stop_server
+
+MB = 1024 * 1024
+BLOCK = random.Random(1).randbytes(MB)
+
+
+def chunk_data(index, size):
+    # Distinct, reproducible content for every chunk, so the file hash is
+    # known before anything is sent
+    data = index.to_bytes(8, 'big') + BLOCK
+    return (data * (size // len(data) + 1))[:size]
+
+
+def chunk_sizes(size, chunk_size):
+    return [min(chunk_size, size - offset) for offset in range(0, size, chunk_size)]
+
+
+def file_sha256(size, chunk_size):
+    digest = hashlib.sha256()
+    for index, length in enumerate(chunk_sizes(size, chunk_size)):
+        digest.update(chunk_data(index, length))
+    return digest.hexdigest()
+
+
+def send_chunks(port, token, upload_id, sizes, parallel):
+    pending = queue.Queue()
+    for index, length in enumerate(sizes):
+        pending.put((index, length))
+    failures = []
+
+    def worker():
+        connection = http.client.HTTPConnection(HOST, port, timeout=120)
+        while True:
+            try:
+                index, length = pending.get_nowait()
+            except queue.Empty:
+                break
+            connection.request('PUT', f'/api/videos/uploads/{upload_id}/chunks/{index}', body=chunk_data(index, length),
+                               headers={'Authorization': f'Bearer {token}', 'Content-Length': str(length)})
+            response = connection.getresponse()
+            body = response.read()
+            if response.status != 200:
+                failures.append(f'chunk {index}: {response.status} {body[:200]!r}')
+        connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(parallel)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if failures:
+        raise RuntimeError('; '.join(failures[:5]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory and throughput of a multi-GB chunked upload')
+    parser.add_argument('--size-gb', type=float, default=4)
+    parser.add_argument('--chunk-mb', type=int, default=8)
+    parser.add_argument('--parallel', type=int, default=4, help='chunks sent at once')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='threads per gunicorn worker')
+    args = parser.parse_args()
+
+    size = int(args.size_gb * 1024 ** 3)
+    chunk_size = args.chunk_mb * MB
+    upload_folder = os.path.join(BACKEND_DIR, 'uploads')
+    os.makedirs(upload_folder, exist_ok=True)
+    existing = set(os.listdir(upload_folder))
+    directory = tempfile.mkdtemp(prefix='gg-benchmark-')
+    database_url = f'sqlite:///{os.path.join(directory, "uploads.db")}'
+    try:
+        backend = import_app(database_url)
+        with backend.app.app_context():
+            user = backend.User(username='uploader', email='uploader@example.com', password_hash='x')
+            backend.db.session.add(user)
+            backend.db.session.commit()
+            token = jwt.encode({'user_id': user.id, 'exp': datetime.utcnow() + timedelta(hours=2)},
+                               backend.app.config['SECRET_KEY'])
+            backend.db.engine.dispose()
+
+        started = time.perf_counter()
+        sha256 = file_sha256(size, chunk_size)
+        print(f'{size / 1024 ** 3:.1f} GiB in {chunk_size // MB} MiB chunks, {args.parallel} at a time; '
+              f'gunicorn {args.workers} workers x {args.threads} threads '
+              f'(client hashed the file in {time.perf_counter() - started:.1f} s)')
+
+        port = free_port()
+        process = start_server('gunicorn', port, database_url, workers=args.workers, threads=args.threads)
+        try:
+            workers = child_pids(process.pid)
+            before = {pid: rss_bytes(pid) for pid in workers}
+
+            connection = http.client.HTTPConnection(HOST, port, timeout=600)
+            upload = call(connection, 'POST', '/api/videos/uploads', {
+                'filename': 'benchmark.mp4', 'size': size, 'chunkSize': chunk_size, 'sha256': sha256
+            }, token)
+            connection.close()
+
+            started = time.perf_counter()
+            send_chunks(port, token, upload['uploadId'], chunk_sizes(size, chunk_size), args.parallel)
+            chunks_seconds = time.perf_counter() - started
+
+            # A new connection: the first one has been idle for longer than the keep-alive
+            connection = http.client.HTTPConnection(HOST, port, timeout=600)
+            started = time.perf_counter()
+            status = call(connection, 'POST', f"/api/videos/uploads/{upload['uploadId']}/complete", token=token)
+            request_seconds = time.perf_counter() - started
+            while status.get('status') == 'verifying':
+                time.sleep(0.2)
+                status = call(connection, 'GET', f"/api/videos/uploads/{upload['uploadId']}", token=token)
+            complete_seconds = time.perf_counter() - started
+            connection.close()
+            if status.get('status', 'complete') != 'complete':
+                raise RuntimeError(f"upload was not completed: {status.get('error')}")
+
+            peaks = {pid: rss_bytes(pid, peak=True) for pid in workers}
+        finally:
+            stop_server(process)
+
+        print(f'  {"chunks":24} {size / MB / chunks_seconds:8.0f} MiB/s ({chunks_seconds:.1f} s)')
+        print(f'  {"complete request":24} {request_seconds * 1000:8.1f} ms')
+        print(f'  {"verified in background":24} {size / MB / complete_seconds:8.0f} MiB/s ({complete_seconds:.1f} s)')
+        for pid in workers:
+            print(f'  {f"worker {pid} RSS":24} {before[pid] / MB:8.1f} MiB before, '
+                  f'{peaks[pid] / MB:.1f} MiB peak (+{(peaks[pid] - before[pid]) / MB:.1f})')
+    finally:
+        for name in set(os.listdir(upload_folder)) - existing:
+            os.remove(os.path.join(upload_folder, name))
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
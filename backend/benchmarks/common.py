@@ -0,0 +1,133 @@
+# Helpers shared by the benchmark scripts in this directory. Every script
+# works on its own SQLite database in a temporary directory, so none of them
+# touches unity_gaming.db.
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = '127.0.0.1'
+
+
+def percentile(values, fraction):
+    # values must be sorted
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def latency_summary(seconds):
+    seconds = sorted(seconds)
+    return {
+        'count': len(seconds),
+        'p50': percentile(seconds, 0.5) * 1000,
+        'p99': percentile(seconds, 0.99) * 1000
+    }
+
+
+def format_latency(label, summary, width=24, unit='ms'):
+    scale = 1000 if unit == 'us' else 1
+    return (f'  {label:{width}} p50 {summary["p50"] * scale:8.2f} {unit}   '
+            f'p99 {summary["p99"] * scale:8.2f} {unit}   ({summary["count"]} runs)')
+
+
+def import_app(database_url):
+    # For benchmarks that drive the app in this process. app.py reads
+    # DATABASE_URL when it is imported.
+    os.environ['DATABASE_URL'] = database_url
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    import app
+    with app.app.app_context():
+        app.init_db()
+    return app
+
+
+def prepare_database(database_url, seed=True):
+    # For benchmarks that run a server: create the schema (and sample data)
+    # the way a deployment does
+    env = dict(os.environ, DATABASE_URL=database_url)
+    for command in ('init-db', 'seed') if seed else ('init-db',):
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', command], cwd=BACKEND_DIR,
+                       env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def call(connection, method, path, body=None, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = connection.getresponse()
+    data = response.read()
+    if response.status >= 400:
+        raise RuntimeError(f'{method} {path} answered {response.status}: {data[:200]!r}')
+    return json.loads(data) if data else None
+
+
+def login(port, username, password='password123'):
+    connection = http.client.HTTPConnection(HOST, port, timeout=10)
+    try:
+        data = call(connection, 'POST', '/api/auth/login', {'username': username, 'password': password})
+    finally:
+        connection.close()
+    return data['token'], data['user']['id']
+
+
+def start_server(name, port, database_url, workers=1, threads=8, env=None):
+    # name is "dev" (the debug server's threaded mode, as python app.py runs
+    # it) or "gunicorn" (gunicorn.conf.py)
+    env = dict(os.environ, DATABASE_URL=database_url, PORT=str(port), **(env or {}))
+    if name == 'dev':
+        command = [sys.executable, '-c', f'from app import app; app.run(host="{HOST}", port={port}, threaded=True)']
+    else:
+        env.update(WEB_CONCURRENCY=str(workers), THREADS=str(threads), ACCESS_LOG='/dev/null',
+                   BIND=f'{HOST}:{port}')
+        command = ['gunicorn', '-c', 'gunicorn.conf.py', 'app:app']
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{name} server exited with {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection(HOST, port, timeout=1)
+            call(connection, 'GET', '/api/health')
+            connection.close()
+            return process
+        except (OSError, RuntimeError):
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{name} server did not start')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def rss_bytes(pid='self', peak=False):
+    # Resident set size of a process, or its peak so far, from /proc (Linux only)
+    field = 'VmHWM:' if peak else 'VmRSS:'
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith(field):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def child_pids(pid):
+    # The worker processes of a gunicorn master (Linux only)
+    with open(f'/proc/{pid}/task/{pid}/children') as children:
+        return [int(child) for child in children.read().split()]
@@ -0,0 +1,109 @@
+# Friend suggestion latency over a synthetic social graph: a hundred thousand
+# users with a few random friendships each, plus one player with a thousand
+# friends who each have about a hundred friends of their own, and two games
+# per user. Times /api/friends/suggestions for that player through the test
+# client, warm (friend lists in the FriendGraph cache) and cold (the cache
+# emptied before every request, so every friend list comes from SQLite).
+#
+#   cd backend
+#   python benchmarks/friend_suggestions.py
+#   python benchmarks/friend_suggestions.py --users 20000 --friends 500 --friends-of-friends 50
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import jwt
+
+from common import format_latency, import_app, latency_summary
+
+GAMES = [f'Game {i}' for i in range(20)]
+
+
+def seed(backend, users, friends, friends_of_friends, background, rng, batch_size=10000):
+    db = backend.db
+    with backend.app.app_context():
+        for start in range(0, users, batch_size):
+            db.session.execute(db.insert(backend.User), [
+                {'username': f'player{i}', 'email': f'player{i}@example.com', 'password_hash': 'x'}
+                for i in range(start, min(start + batch_size, users))
+            ])
+        games = backend.get_or_create_games(GAMES)
+        db.session.flush()
+        game_ids = [game.id for game in games]
+        user_games = [{'user_id': user_id, 'game_id': game_id}
+                      for user_id in range(1, users + 1) for game_id in rng.sample(game_ids, 2)]
+
+        # User 1 is the player asking for suggestions
+        pairs = set()
+        for friend_id in range(2, friends + 2):
+            pairs.add((1, friend_id))
+            for other_id in rng.sample(range(2, users + 1), friends_of_friends):
+                if other_id != friend_id:
+                    pairs.add((min(friend_id, other_id), max(friend_id, other_id)))
+        for user_id in range(2, users + 1):
+            for other_id in rng.sample(range(2, users + 1), background):
+                if other_id != user_id:
+                    pairs.add((min(user_id, other_id), max(user_id, other_id)))
+        rows = [{'user_id': a, 'friend_id': b} for a, b in pairs] + [{'user_id': b, 'friend_id': a} for a, b in pairs]
+
+        for table, values in ((backend.UserGame, user_games), (backend.Friendship, rows)):
+            for start in range(0, len(values), batch_size):
+                db.session.execute(db.insert(table), values[start:start + batch_size])
+        db.session.commit()
+        return len(rows), len(backend.friend_graph.friends(1))
+
+
+def measure(backend, client, headers, requests, cold):
+    timings = []
+    for _ in range(requests):
+        if cold:
+            backend.friend_graph.clear()
+        started = time.perf_counter()
+        response = client.get('/api/friends/suggestions', headers=headers)
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.get_json()
+    return latency_summary(timings), response.get_json()['suggestions']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Friend suggestion latency for a well-connected player')
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--friends', type=int, default=1000, help="the player's friends")
+    parser.add_argument('--friends-of-friends', type=int, default=100, help='friends of each of those friends')
+    parser.add_argument('--background', type=int, default=5, help='random friendships made by every other user')
+    parser.add_argument('--requests', type=int, default=200, help='requests per mode')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    directory = tempfile.mkdtemp(prefix='gg-benchmark-')
+    try:
+        backend = import_app(f'sqlite:///{os.path.join(directory, "friends.db")}')
+        started = time.perf_counter()
+        rows, friends = seed(backend, args.users, args.friends, args.friends_of_friends, args.background, rng)
+        print(f'{args.users} users, {rows} friendship rows, the player has {friends} friends '
+              f'(seeded in {time.perf_counter() - started:.1f} s)')
+
+        with backend.app.app_context():
+            token = jwt.encode({'user_id': 1, 'exp': datetime.utcnow() + timedelta(hours=1)},
+                               backend.app.config['SECRET_KEY'])
+        headers = {'Authorization': f'Bearer {token}'}
+        client = backend.app.test_client()
+        measure(backend, client, headers, 20, cold=False)  # warm up the page cache and code paths
+
+        for cold in (True, False):
+            summary, suggestions = measure(backend, client, headers, args.requests, cold)
+            print(format_latency('cold friend graph' if cold else 'warm friend graph', summary))
+        top = suggestions[0]
+        print(f'  {"top suggestion":24} user {top["id"]} with {top["mutualFriends"]} mutual friends, '
+              f'{len(top["sharedGames"])} shared games')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+# Matchmaking at growing queue sizes. For each size it builds a
+# MatchmakingIndex of random players spread over a few games and times
+# top-10 searches (what /find does), one MatchQueue.pair() round over the
+# whole queue, and one QuickMatchmaker.pair() round, which reads the same
+# queue from QuickMatchEntry rows and claims every pair in the database.
+#
+#   cd backend
+#   python benchmarks/matchmaking_queue.py
+#   python benchmarks/matchmaking_queue.py --sizes 1000 10000 100000 --db-sizes 1000 10000 --searches 5000
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from common import format_latency, import_app, latency_summary
+
+GAMES = ['Valorant', 'League of Legends', 'CS2', 'Overwatch 2', 'Apex Legends']
+ROLES = ['Duelist', 'Controller', 'Initiator', 'Sentinel', 'Flex']
+REGIONS = ['ca', 'ny', 'tx', 'wa', 'fl', 'il']
+
+
+def random_players(backend, count, rng, now):
+    return [
+        backend.Player(
+            user_id, rng.choice(GAMES), rng.uniform(400, 3400), role=rng.choice(ROLES),
+            win_rate=rng.uniform(0.3, 0.7), hours_played=rng.randint(0, 3000), region=rng.choice(REGIONS),
+            queued_at=now - rng.uniform(0, 120)
+        )
+        for user_id in range(1, count + 1)
+    ]
+
+
+def new_index(backend, **options):
+    return backend.MatchmakingIndex(
+        base_window=backend.app.config['MATCHMAKING_BASE_WINDOW'],
+        widen_per_second=backend.app.config['MATCHMAKING_WIDEN_PER_SECOND'],
+        max_window=backend.app.config['MATCHMAKING_MAX_WINDOW'],
+        **options
+    )
+
+
+def in_memory(backend, size, searches, rng):
+    now = time.monotonic()
+    players = random_players(backend, size, rng, now)
+
+    index = new_index(backend)
+    started = time.perf_counter()
+    for player in players:
+        index.add(player)
+    build = time.perf_counter() - started
+
+    timings = []
+    for player in rng.sample(players, min(searches, size)):
+        started = time.perf_counter()
+        index.search(player, k=10, now=now)
+        timings.append(time.perf_counter() - started)
+
+    # Scanned as narrowly as the quick-match loop does
+    queue = backend.MatchQueue(new_index(backend, max_scan=backend.app.config['QUICK_MATCH_MAX_SCAN']))
+    for player in players:
+        queue.enqueue([player])
+    started = time.perf_counter()
+    pairs = queue.pair(now=now)
+    round_seconds = time.perf_counter() - started
+    return build, latency_summary(timings), round_seconds, len(pairs)
+
+
+def in_database(backend, size, rng):
+    db = backend.db
+    with backend.app.app_context():
+        db.session.execute(db.delete(backend.QuickMatchEntry))
+        db.session.execute(db.delete(backend.MatchHistory))
+        existing = db.session.query(backend.User).count()
+        now = datetime.utcnow()
+        if existing < size:
+            db.session.execute(db.insert(backend.User), [
+                {'username': f'player{i}', 'email': f'player{i}@example.com', 'password_hash': 'x',
+                 'last_active': now}
+                for i in range(existing, size)
+            ])
+        user_ids = [user_id for user_id, in db.session.query(backend.User.id).order_by(backend.User.id).limit(size)]
+        db.session.execute(db.insert(backend.QuickMatchEntry), [
+            {'user_id': user_id, 'game': player.game, 'rating': player.rating, 'role': player.role,
+             'win_rate': player.win_rate, 'hours_played': player.hours_played, 'region': player.region,
+             'status': 'queued', 'queued_at': now - timedelta(seconds=rng.uniform(0, 120))}
+            for user_id, player in zip(user_ids, random_players(backend, size, rng, 0))
+        ])
+        db.session.commit()
+
+    started = time.perf_counter()
+    pairs = backend.quick_matchmaker.pair()
+    return time.perf_counter() - started, pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Matchmaking index search and queue pairing at several queue sizes')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='in-memory queue sizes')
+    parser.add_argument('--db-sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='QuickMatchEntry queue sizes')
+    parser.add_argument('--searches', type=int, default=2000, help='timed searches per size')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    directory = tempfile.mkdtemp(prefix='gg-benchmark-')
+    try:
+        backend = import_app(f'sqlite:///{os.path.join(directory, "matchmaking.db")}')
+
+        for size in args.sizes:
+            build, search, round_seconds, pairs = in_memory(backend, size, args.searches, rng)
+            print(f'{size} queued players, in memory')
+            print(f'  {"index build":24} {build * 1000:8.1f} ms')
+            print(format_latency('search (top 10)', search))
+            print(f'  {"pair round":24} {round_seconds * 1000:8.1f} ms   {pairs} pairs')
+
+        for size in args.db_sizes:
+            round_seconds, pairs = in_database(backend, size, rng)
+            print(f'{size} queued players, QuickMatchEntry rows')
+            print(f'  {"pair round":24} {round_seconds * 1000:8.1f} ms   {pairs} pairs claimed')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# What request metrics cost per request: the same endpoints timed through the
+# test client with metrics and Server-Timing on (the default), with only the
+# Server-Timing header off, and with both off. app.py installs the hooks when
+# it is imported, so each mode runs in its own process with its own database,
+# started by this script. Also times a scrape of /api/metrics once those
+# endpoints have series.
+#
+#   cd backend
+#   python benchmarks/metrics_overhead.py
+#   python benchmarks/metrics_overhead.py --requests 20000
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import jwt
+
+from common import format_latency, import_app, latency_summary
+
+MODES = {
+    'metrics and Server-Timing': {'METRICS_ENABLED': '1', 'SERVER_TIMING': '1'},
+    'metrics only': {'METRICS_ENABLED': '1', 'SERVER_TIMING': '0'},
+    'off': {'METRICS_ENABLED': '0', 'SERVER_TIMING': '0'},
+}
+
+
+def measure(client, path, headers, requests):
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(path, headers=headers)
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.get_data(as_text=True)[:200]
+    return latency_summary(timings)
+
+
+def run_mode(requests):
+    directory = tempfile.mkdtemp(prefix='gg-benchmark-')
+    try:
+        backend = import_app(f'sqlite:///{os.path.join(directory, "metrics.db")}')
+        with backend.app.app_context():
+            user = backend.User(username='bench', email='bench@example.com', password_hash='x')
+            backend.db.session.add(user)
+            backend.db.session.commit()
+            video = backend.Video(user_id=user.id, title='clip', filename='clip.mp4', status='Published')
+            backend.db.session.add(video)
+            backend.db.session.commit()
+            token = jwt.encode({'user_id': user.id, 'exp': datetime.utcnow() + timedelta(hours=1)},
+                               backend.app.config['SECRET_KEY'])
+            video_id = video.id
+        headers = {'Authorization': f'Bearer {token}'}
+        client = backend.app.test_client()
+
+        for path in ('/api/health', '/api/auth/verify', f'/api/videos/{video_id}'):
+            measure(client, path, headers, 200)  # warm up caches and code paths
+            print(format_latency(path, measure(client, path, headers, requests)))
+        if backend.app.config['METRICS_ENABLED']:
+            print(format_latency('/api/metrics scrape', measure(client, '/api/metrics', headers, 200)))
+        backend.view_counter.flush()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-request cost of request metrics and Server-Timing')
+    parser.add_argument('--requests', type=int, default=5000, help='requests per endpoint and mode')
+    parser.add_argument('--in-process', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.in_process:
+        run_mode(args.requests)
+        return
+    for label, env in MODES.items():
+        print(label, flush=True)
+        subprocess.run([sys.executable, __file__, '--in-process', '--requests', str(args.requests)],
+                       env=dict(os.environ, **env), check=True)
+
+
+if __name__ == '__main__':
+    main()
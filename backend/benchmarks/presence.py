@@ -0,0 +1,98 @@
+# The presence tracker at 10k and 100k online users, each in two games: its
+# memory (tracemalloc), touch() per request, online_for_game() and an
+# expire() with nothing due, then one PresenceWriter.flush() writing every
+# touched user to SQLite in a single batch.
+#
+#   cd backend
+#   python benchmarks/presence.py
+#   python benchmarks/presence.py --users 100000 200000 --max-users 150000
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from common import format_latency, import_app, latency_summary
+
+GAMES = [f'Game {i}' for i in range(20)]
+
+
+def timed(calls, function):
+    timings = []
+    for arguments in calls:
+        started = time.perf_counter()
+        function(*arguments)
+        timings.append(time.perf_counter() - started)
+    return latency_summary(timings)
+
+
+def in_memory(backend, users, max_users, rng):
+    games = {user_id: rng.sample(GAMES, 2) for user_id in range(1, users + 1)}
+
+    tracemalloc.start()
+    tracker = backend.PresenceTracker(backend.app.config['PRESENCE_TTL_SECONDS'], max_users)
+    for user_id, user_games in games.items():
+        tracker.touch(user_id, user_games)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return {
+        'tracked': len(tracker),
+        'memory': memory,
+        'touch': timed([(rng.randint(1, users),) for _ in range(10000)], tracker.touch),
+        'online_for_game': timed([(rng.choice(GAMES), 50) for _ in range(2000)], tracker.online_for_game),
+        'expire': timed([()] * 2000, tracker.expire)
+    }
+
+
+def flush(backend, users):
+    db = backend.db
+    with backend.app.app_context():
+        existing = db.session.query(backend.User).count()
+        if existing < users:
+            db.session.execute(db.insert(backend.User), [
+                {'username': f'player{i}', 'email': f'player{i}@example.com', 'password_hash': 'x'}
+                for i in range(existing, users)
+            ])
+            db.session.commit()
+        user_ids = [user_id for user_id, in db.session.query(backend.User.id).limit(users)]
+
+    backend.presence.tracker = backend.PresenceTracker(backend.app.config['PRESENCE_TTL_SECONDS'], users)
+    for user_id in user_ids:
+        # The tracker directly, so no flusher thread starts
+        backend.presence.tracker.touch(user_id, ())
+    started = time.perf_counter()
+    written, _ = backend.presence.flush()
+    return time.perf_counter() - started, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Presence tracker memory and speed, and batched flushes')
+    parser.add_argument('--users', type=int, nargs='+', default=[10000, 100000], help='online users')
+    parser.add_argument('--max-users', type=int, help='tracker cap (default: PRESENCE_MAX_USERS)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    directory = tempfile.mkdtemp(prefix='gg-benchmark-')
+    try:
+        backend = import_app(f'sqlite:///{os.path.join(directory, "presence.db")}')
+        max_users = args.max_users or backend.app.config['PRESENCE_MAX_USERS']
+
+        for users in args.users:
+            result = in_memory(backend, users, max_users, rng)
+            print(f'{users} online users in two games each, tracker capped at {max_users}')
+            print(f'  {"tracked":24} {result["tracked"]:8d} users in {result["memory"] / 1024 ** 2:.1f} MiB')
+            print(format_latency('touch', result['touch'], unit='us'))
+            print(format_latency('online_for_game(50)', result['online_for_game'], unit='us'))
+            print(format_latency('expire, nothing due', result['expire'], unit='us'))
+            seconds, written = flush(backend, users)
+            print(f'  {"flush to SQLite":24} {seconds * 1000:8.1f} ms for {written} users in one transaction')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
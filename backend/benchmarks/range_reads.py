@@ -0,0 +1,121 @@
+# Concurrent seeks into a large video: client threads request random byte
+# ranges of one file under backend/uploads through /uploads/<filename>, the
+# way players scrub through a video, and check every 206 response. Reports
+# requests and bytes per second, latency, and the resident memory of every
+# worker before and at its peak, read from /proc, overall and per request in
+# flight. The file is deleted afterwards.
+#
+#   cd backend
+#   python benchmarks/range_reads.py
+#   python benchmarks/range_reads.py --size-gb 4 --range-kb 4096 --concurrency 64 --seconds 20
+import argparse
+import http.client
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from common import (BACKEND_DIR, HOST, child_pids, format_latency, free_port, import_app, latency_summary,
+                    rss_bytes, start_server, stop_server)
+
+MB = 1024 * 1024
+
+
+def write_video(path, size):
+    # Real bytes rather than a sparse file, so reads come from disk or the page cache
+    block = os.urandom(MB)
+    with open(path, 'wb') as video:
+        for offset in range(0, size, MB):
+            video.write(block[:min(MB, size - offset)])
+
+
+def seek(port, filename, size, range_size, deadline, seed):
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection(HOST, port, timeout=60)
+    timings = []
+    received = 0
+    while time.monotonic() < deadline:
+        start = rng.randrange(0, size - range_size)
+        started = time.perf_counter()
+        connection.request('GET', f'/uploads/{filename}', headers={'Range': f'bytes={start}-{start + range_size - 1}'})
+        response = connection.getresponse()
+        body = response.read()
+        timings.append(time.perf_counter() - started)
+        if response.status != 206 or len(body) != range_size:
+            raise RuntimeError(f'bytes={start}-: {response.status} with {len(body)} bytes')
+        received += len(body)
+    connection.close()
+    return timings, received
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent range requests against a large uploaded file')
+    parser.add_argument('--size-gb', type=float, default=2)
+    parser.add_argument('--range-kb', type=int, default=1024, help='bytes per range request')
+    parser.add_argument('--concurrency', type=int, default=32, help='client threads')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=16, help='threads per gunicorn worker')
+    args = parser.parse_args()
+
+    size = int(args.size_gb * 1024 ** 3)
+    range_size = args.range_kb * 1024
+    filename = f'benchmark-{uuid.uuid4().hex}.mp4'
+    upload_folder = os.path.join(BACKEND_DIR, 'uploads')
+    os.makedirs(upload_folder, exist_ok=True)
+    path = os.path.join(upload_folder, filename)
+    directory = tempfile.mkdtemp(prefix='gg-benchmark-')
+    database_url = f'sqlite:///{os.path.join(directory, "ranges.db")}'
+    try:
+        import_app(database_url)  # creates the schema the server starts on
+        write_video(path, size)
+
+        port = free_port()
+        process = start_server('gunicorn', port, database_url, workers=args.workers, threads=args.threads)
+        try:
+            workers = child_pids(process.pid)
+            before = {pid: rss_bytes(pid) for pid in workers}
+
+            results = []
+            lock = threading.Lock()
+            deadline = time.monotonic() + args.seconds
+
+            def client(seed):
+                result = seek(port, filename, size, range_size, deadline, seed)
+                with lock:
+                    results.append(result)
+
+            threads = [threading.Thread(target=client, args=(seed,)) for seed in range(args.concurrency)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+            peaks = {pid: rss_bytes(pid, peak=True) for pid in workers}
+        finally:
+            stop_server(process)
+
+        timings = [timing for result_timings, _ in results for timing in result_timings]
+        received = sum(result_received for _, result_received in results)
+        print(f'{size / 1024 ** 3:.1f} GiB file, {args.range_kb} KiB ranges, {args.concurrency} client threads, '
+              f'gunicorn {args.workers} workers x {args.threads} threads')
+        print(f'  {"throughput":24} {len(timings) / elapsed:8.0f} requests per second, {received / MB / elapsed:.0f} MiB/s')
+        print(format_latency('range request', latency_summary(timings)))
+        in_flight = min(args.concurrency, args.workers * args.threads) / args.workers
+        for pid in workers:
+            growth = peaks[pid] - before[pid]
+            print(f'  {f"worker {pid} RSS":24} {before[pid] / MB:8.1f} MiB before, {peaks[pid] / MB:.1f} MiB peak '
+                  f'(+{growth / MB:.1f}, {growth / 1024 / in_flight:.0f} KiB per request in flight)')
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# Typeahead latency over a synthetic dataset: a million users with made-up
+# names, bios and locations (a few percent online) and a set of videos, all
+# indexed by the FTS5 triggers as they are inserted. Queries replay someone
+# typing an existing username one keystroke at a time, from two letters on,
+# against /api/search/typeahead through the test client, with the response
+# cache emptied before every request so each one reaches the database.
+#
+#   cd backend
+#   python benchmarks/search_typeahead.py
+#   python benchmarks/search_typeahead.py --users 100000 --videos 10000 --names 500
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from urllib.parse import quote
+
+from common import format_latency, import_app, latency_summary
+
+SYLLABLES = [
+    'ace', 'ash', 'bat', 'bit', 'blu', 'bo', 'cy', 'da', 'dark', 'dex', 'dra', 'ek', 'fa', 'fox', 'fro', 'gal',
+    'gho', 'gri', 'hex', 'ho', 'ix', 'jin', 'ka', 'kai', 'kid', 'lo', 'lux', 'ma', 'mo', 'neo', 'ni', 'nox',
+    'om', 'pix', 'pro', 'qu', 'ra', 'rex', 'ro', 'sa', 'sha', 'sky', 'sol', 'ta', 'tek', 'to', 'ul', 'va',
+    'vex', 'vi', 'wo', 'xe', 'yo', 'za', 'zed', 'zo'
+]
+WORDS = [
+    'ranked', 'casual', 'support', 'sniper', 'team', 'duo', 'grind', 'chill', 'competitive', 'streamer',
+    'looking', 'for', 'players', 'evening', 'weekend', 'tank', 'healer', 'entry', 'clutch', 'coach'
+]
+CITIES = ['Austin, TX', 'Seattle, WA', 'Miami, FL', 'Chicago, IL', 'Denver, CO', 'Los Angeles, CA', 'Boston, MA']
+GAMES = ['Valorant', 'League of Legends', 'CS2', 'Overwatch 2', 'Apex Legends']
+
+
+def username(rng, number):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))) + str(number)
+
+
+def seed(backend, users, videos, rng, batch_size=10000):
+    db = backend.db
+    with backend.app.app_context():
+        for start in range(0, users, batch_size):
+            db.session.execute(db.insert(backend.User), [
+                {'username': username(rng, i), 'email': f'user{i}@example.com', 'password_hash': 'x',
+                 'bio': ' '.join(rng.choices(WORDS, k=6)), 'location': rng.choice(CITIES),
+                 'is_online': rng.random() < 0.05}
+                for i in range(start, min(start + batch_size, users))
+            ])
+        for start in range(0, videos, batch_size):
+            db.session.execute(db.insert(backend.Video), [
+                {'user_id': rng.randint(1, users), 'title': f'{rng.choice(WORDS)} {rng.choice(SYLLABLES)} highlights',
+                 'description': ' '.join(rng.choices(WORDS, k=8)), 'game': rng.choice(GAMES),
+                 'filename': f'clip{i}.mp4', 'status': 'Published', 'views': rng.randint(0, 100000)}
+                for i in range(start, min(start + batch_size, videos))
+            ])
+        db.session.commit()
+        names = [name for name, in db.session.query(backend.User.username).order_by(db.func.random()).limit(1000)]
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Typeahead latency over a synthetic user and video dataset')
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--videos', type=int, default=100000)
+    parser.add_argument('--names', type=int, default=300, help='usernames typed out, one keystroke per query')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    directory = tempfile.mkdtemp(prefix='gg-benchmark-')
+    try:
+        backend = import_app(f'sqlite:///{os.path.join(directory, "search.db")}')
+        started = time.perf_counter()
+        names = seed(backend, args.users, args.videos, rng)
+        print(f'{args.users} users and {args.videos} videos indexed in {time.perf_counter() - started:.1f} s')
+
+        client = backend.app.test_client()
+        # "ze", "zed", "zedk", ... for randomly chosen existing usernames
+        queries = [name[:length] for name in rng.sample(names, args.names) for length in range(2, len(name) + 1)]
+        for query in queries[:50]:
+            # Warm up the page cache
+            client.get(f'/api/search/typeahead?q={quote(query)}')
+
+        timings = []
+        by_length = {}
+        for query in queries:
+            backend.response_cache.clear()
+            started = time.perf_counter()
+            response = client.get(f'/api/search/typeahead?q={quote(query)}')
+            elapsed = time.perf_counter() - started
+            assert response.status_code == 200, response.get_json()
+            timings.append(elapsed)
+            by_length.setdefault(min(len(query), 6), []).append(elapsed)
+
+        print(format_latency('typeahead', latency_summary(timings)))
+        for length, lengths in sorted(by_length.items()):
+            label = f'{length}+ characters' if length == 6 else f'{length} characters'
+            print(format_latency(label, latency_summary(lengths)))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+# Load test comparing the debug server (python app.py) with gunicorn on the
+# trending list and on chat: sending messages, and how long a sent message
+# takes to reach the recipient's open stream. Each server gets its own seeded
+# SQLite database in a temporary directory.
+#
+#   cd backend
+#   python benchmarks/serving.py             # both servers, gunicorn with WEB_CONCURRENCY workers
+#   python benchmarks/serving.py --workers 4 --threads 8 --requests 4000 --concurrency 16
+#
+# The numbers are for comparing servers and settings on one machine; they say
+# little about another machine or database.
+import argparse
+import http.client
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from common import HOST, call, free_port, login, percentile, prepare_database, start_server, stop_server
+
+
+def load(port, requests, concurrency, request):
+    # Every thread keeps one connection open and runs its share of the requests
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(count):
+        connection = http.client.HTTPConnection(HOST, port, timeout=30)
+        timings = []
+        try:
+            for i in range(count):
+                started = time.perf_counter()
+                request(connection, i)
+                timings.append(time.perf_counter() - started)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(timings)
+
+    threads = [
+        threading.Thread(target=worker, args=(requests // concurrency + (i < requests % concurrency),))
+        for i in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise errors[0]
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': percentile(latencies, 0.5) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000
+    }
+
+
+def stream_delivery(port, sender_token, recipient_token, recipient_id, samples):
+    # Opens the recipient's stream, sends messages one at a time on other
+    # connections (so, under gunicorn, usually to other workers) and times each
+    # until its event arrives
+    connection = http.client.HTTPConnection(HOST, port, timeout=10)
+    ticket = call(connection, 'POST', '/api/chat/stream/ticket', token=recipient_token)['ticket']
+    stream = http.client.HTTPConnection(HOST, port, timeout=10)
+    stream.request('GET', f'/api/chat/stream?ticket={ticket}')
+    response = stream.getresponse()
+    response.readline()  # retry: ...
+    response.readline()
+
+    latencies = []
+    missed = 0
+    try:
+        for i in range(samples):
+            sender = http.client.HTTPConnection(HOST, port, timeout=10)
+            content = f'benchmark {i} {time.time()}'
+            started = time.perf_counter()
+            call(sender, 'POST', '/api/chat/send', {'recipientId': recipient_id, 'content': content},
+                 token=sender_token)
+            sender.close()
+            try:
+                while True:
+                    line = response.readline()
+                    if not line:
+                        raise OSError('stream closed')
+                    if line.startswith(b'data: ') and content.encode() in line:
+                        latencies.append(time.perf_counter() - started)
+                        break
+            except OSError:
+                missed = samples - i
+                break
+    finally:
+        stream.close()
+        connection.close()
+    latencies.sort()
+    return {
+        'delivered': f'{len(latencies)}/{samples}',
+        'p50': percentile(latencies, 0.5) * 1000 if latencies else float('nan'),
+        'p99': percentile(latencies, 0.99) * 1000 if latencies else float('nan'),
+        'missed': missed
+    }
+
+
+def benchmark(name, args, directory):
+    database_url = f'sqlite:///{os.path.join(directory, f"{name}.db")}'
+    prepare_database(database_url)
+
+    port = free_port()
+    process = start_server(name, port, database_url, workers=args.workers, threads=args.threads)
+    try:
+        sender_token, _ = login(port, 'ProShooter99')
+        recipient_token, recipient_id = login(port, 'StrategyMaster')
+        # Warm up the caches, the connection pools and, under gunicorn, every worker
+        load(port, args.concurrency * 20, args.concurrency,
+             lambda connection, i: call(connection, 'GET', '/api/videos/trending'))
+
+        results = {
+            'trending': load(port, args.requests, args.concurrency,
+                             lambda connection, i: call(connection, 'GET', '/api/videos/trending')),
+            'chat.send': load(port, args.requests // 4, args.concurrency, lambda connection, i: call(
+                connection, 'POST', '/api/chat/send',
+                {'recipientId': recipient_id, 'content': f'load {i}'}, token=sender_token
+            )),
+            'chat.stream': stream_delivery(port, sender_token, recipient_token, recipient_id, args.stream_samples)
+        }
+    finally:
+        stop_server(process)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the debug server with gunicorn')
+    parser.add_argument('--servers', default='dev,gunicorn', help='comma-separated: dev, gunicorn')
+    parser.add_argument('--requests', type=int, default=2000, help='trending requests per server')
+    parser.add_argument('--concurrency', type=int, default=16, help='client threads')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1)),
+                        help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('THREADS', 8)),
+                        help='threads per gunicorn worker')
+    parser.add_argument('--stream-samples', type=int, default=50, help='messages timed to the open stream')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='gg-benchmark-')
+    try:
+        for name in args.servers.split(','):
+            label = name if name == 'dev' else f'{name} ({args.workers} workers x {args.threads} threads)'
+            results = benchmark(name, args, directory)
+            print(label)
+            for endpoint in ('trending', 'chat.send'):
+                result = results[endpoint]
+                print(f'  {endpoint:12} {result["rps"]:8.0f} req/s   p50 {result["p50"]:7.2f} ms   '
+                      f'p99 {result["p99"]:7.2f} ms')
+            stream = results['chat.stream']
+            print(f'  {"chat.stream":12} {stream["delivered"]:>8} delivered   p50 {stream["p50"]:7.2f} ms   '
+                  f'p99 {stream["p99"]:7.2f} ms')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
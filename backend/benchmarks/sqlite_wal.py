@@ -0,0 +1,133 @@
+# Read throughput while writes arrive in bursts, with SQLite's defaults
+# (rollback journal, synchronous=FULL) and with the pragmas the app sets on
+# every connection (WAL, synchronous=NORMAL, busy_timeout, cache and mmap).
+# Reader threads run the trending query; one writer commits batches of view
+# count updates, like ViewCounter's flush.
+#
+#   cd backend
+#   python benchmarks/sqlite_wal.py
+#   python benchmarks/sqlite_wal.py --videos 50000 --readers 8 --seconds 10 --burst 1000
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from common import format_latency, import_app, latency_summary
+
+TRENDING = (
+    "SELECT id, title, views, likes FROM video WHERE status = 'Published' AND visibility = 'Public' "
+    'ORDER BY trending_score DESC LIMIT 50'
+)
+WRITE = 'UPDATE video SET views = views + 1, trending_score = trending_score + 1 WHERE id = ?'
+
+
+def connect(path, mode, configure):
+    connection = sqlite3.connect(path, timeout=5, check_same_thread=False)
+    if mode == 'tuned':
+        configure(connection, None)
+    return connection
+
+
+def run(path, mode, configure, args):
+    setup = sqlite3.connect(path)
+    setup.execute(f"PRAGMA journal_mode={'WAL' if mode == 'tuned' else 'DELETE'}")
+    setup.close()
+
+    stop = threading.Event()
+    read_latencies = []
+    read_errors = []
+    write_latencies = []
+    write_errors = []
+    lock = threading.Lock()
+
+    def reader():
+        connection = connect(path, mode, configure)
+        timings = []
+        errors = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                connection.execute(TRENDING).fetchall()
+                timings.append(time.perf_counter() - started)
+            except sqlite3.OperationalError:
+                errors += 1
+        connection.close()
+        with lock:
+            read_latencies.extend(timings)
+            read_errors.append(errors)
+
+    def writer():
+        connection = connect(path, mode, configure)
+        ids = range(1, args.videos + 1)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with connection:
+                    connection.executemany(WRITE, [(random.choice(ids),) for _ in range(args.burst)])
+                write_latencies.append(time.perf_counter() - started)
+            except sqlite3.OperationalError:
+                write_errors.append(1)
+            stop.wait(args.burst_interval)
+        connection.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'reads_per_second': len(read_latencies) / args.seconds,
+        'read': latency_summary(read_latencies),
+        'read_errors': sum(read_errors),
+        'write': latency_summary(write_latencies),
+        'write_errors': len(write_errors)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite reads during write bursts: default journal vs WAL')
+    parser.add_argument('--videos', type=int, default=20000)
+    parser.add_argument('--readers', type=int, default=4, help='reader threads')
+    parser.add_argument('--seconds', type=float, default=5, help='duration of each run')
+    parser.add_argument('--burst', type=int, default=500, help='view updates per write transaction')
+    parser.add_argument('--burst-interval', type=float, default=0.05, help='seconds between write bursts')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='gg-benchmark-')
+    path = os.path.join(directory, 'wal.db')
+    try:
+        backend = import_app(f'sqlite:///{path}')
+        with backend.app.app_context():
+            user = backend.User(username='bench', email='bench@example.com', password_hash='x')
+            backend.db.session.add(user)
+            backend.db.session.flush()
+            backend.db.session.execute(backend.db.insert(backend.Video), [
+                {'user_id': user.id, 'title': f'clip {i}', 'filename': f'clip{i}.mp4', 'status': 'Published',
+                 'views': i, 'likes': 0, 'trending_score': i}
+                for i in range(args.videos)
+            ])
+            backend.db.session.commit()
+            backend.db.engine.dispose()
+
+        for mode in ('default', 'tuned'):
+            result = run(path, mode, backend.configure_sqlite_connection, args)
+            print(f"{mode} ({'rollback journal, synchronous=FULL' if mode == 'default' else 'WAL and app pragmas'})")
+            print(f"  {'reads':24} {result['reads_per_second']:8.0f} per second   "
+                  f"{result['read_errors']} failed with 'database is locked'")
+            print(format_latency('trending read', result['read']))
+            print(format_latency(f'write burst ({args.burst})', result['write']))
+            if result['write_errors']:
+                print(f"  {result['write_errors']} write bursts failed with 'database is locked'")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
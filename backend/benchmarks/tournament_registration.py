@@ -0,0 +1,129 @@
+# Burst of simultaneous registrations for one tournament through gunicorn:
+# thousands of players, fewer seats. Reports throughput and checks the
+# database afterwards: seats taken, registrations and entry fees charged must
+# all equal the capacity, so the oversell count must be 0.
+#
+#   cd backend
+#   python benchmarks/tournament_registration.py
+#   python benchmarks/tournament_registration.py --players 5000 --seats 1000 --concurrency 64 --workers 4
+import argparse
+import http.client
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import jwt
+
+from common import HOST, free_port, import_app, latency_summary, format_latency, start_server, stop_server
+
+
+def seed(backend, players, seats):
+    with backend.app.app_context():
+        db = backend.db
+        db.session.execute(db.insert(backend.User), [
+            {'username': f'player{i}', 'email': f'player{i}@example.com', 'password_hash': 'x'}
+            for i in range(players)
+        ])
+        user_ids = [user_id for user_id, in db.session.query(backend.User.id).order_by(backend.User.id)]
+        db.session.execute(db.insert(backend.Wallet), [
+            {'user_id': user_id, 'balance_cents': 10000} for user_id in user_ids
+        ])
+        tournament = backend.Tournament(name='Burst Cup', game='Valorant', entry_fee=5.0, max_participants=seats)
+        db.session.add(tournament)
+        db.session.commit()
+        tournament_id = tournament.id
+        db.engine.dispose()
+
+    expires = datetime.utcnow() + timedelta(hours=1)
+    tokens = [
+        jwt.encode({'user_id': user_id, 'exp': expires}, backend.app.config['SECRET_KEY'])
+        for user_id in user_ids
+    ]
+    return tournament_id, tokens
+
+
+def fire(port, tournament_id, tokens, concurrency):
+    statuses = {}
+    latencies = []
+    lock = threading.Lock()
+    start = threading.Barrier(concurrency + 1)
+
+    def worker(share):
+        connection = http.client.HTTPConnection(HOST, port, timeout=60)
+        counts = {}
+        timings = []
+        start.wait()
+        for token in share:
+            started = time.perf_counter()
+            try:
+                connection.request('POST', f'/api/tournaments/{tournament_id}/register',
+                                   headers={'Authorization': f'Bearer {token}'})
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except OSError:
+                connection.close()
+                connection = http.client.HTTPConnection(HOST, port, timeout=60)
+                status = 'connection error'
+            timings.append(time.perf_counter() - started)
+            counts[status] = counts.get(status, 0) + 1
+        connection.close()
+        with lock:
+            latencies.extend(timings)
+            for status, count in counts.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(tokens[i::concurrency],)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, statuses, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simultaneous registrations for one tournament')
+    parser.add_argument('--players', type=int, default=3000)
+    parser.add_argument('--seats', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=32, help='client threads')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='threads per gunicorn worker')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='gg-benchmark-')
+    database_url = f'sqlite:///{os.path.join(directory, "registrations.db")}'
+    try:
+        backend = import_app(database_url)
+        tournament_id, tokens = seed(backend, args.players, args.seats)
+
+        port = free_port()
+        process = start_server('gunicorn', port, database_url, workers=args.workers, threads=args.threads)
+        try:
+            elapsed, statuses, latencies = fire(port, tournament_id, tokens, args.concurrency)
+        finally:
+            stop_server(process)
+
+        with backend.app.app_context():
+            tournament = backend.db.session.get(backend.Tournament, tournament_id)
+            registrations = backend.TournamentRegistration.query.filter_by(tournament_id=tournament_id).count()
+            charged = backend.Transaction.query.filter_by(reference_id=f'tournament_{tournament_id}').count()
+            participants = tournament.current_participants
+
+        print(f'{args.players} players, {args.seats} seats, {args.concurrency} client threads, '
+              f'gunicorn {args.workers} workers x {args.threads} threads')
+        print(f'  {"throughput":24} {args.players / elapsed:8.0f} registrations per second ({elapsed:.2f} s)')
+        print(format_latency('register', latency_summary(latencies)))
+        print(f'  {"responses":24} ' + ', '.join(f'{status}: {count}' for status, count in sorted(statuses.items(), key=str)))
+        print(f'  {"seats taken":24} {participants}   registrations {registrations}   fees charged {charged}')
+        print(f'  {"oversell":24} {max(participants, registrations, charged) - args.seats}')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import heapq
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+from itertools import chain
+
+
+# Friend lists cached per user as frozensets, so "are A and B friends" is a set
+# lookup and friend-of-friend suggestions are set arithmetic. Misses are loaded
+# in one batch by load(user_ids) -> {user_id: friend ids}. Entries expire after
+# ttl_seconds so that friendships made through other worker processes show up;
+# writes made by this process invalidate both users straight away.
+class FriendGraph:
+    def __init__(self, load, ttl_seconds=60, max_users=100000):
+        self._load = load
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._entries = OrderedDict()  # user_id -> (expires_at, frozenset of friend ids)
+        self._lock = threading.Lock()
+
+    def friends(self, user_id):
+        return self.friends_of([user_id])[user_id]
+
+    def friends_of(self, user_ids):
+        now = time.monotonic()
+        found = {}
+        missing = []
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._entries.get(user_id)
+                if entry is None or entry[0] < now:
+                    missing.append(user_id)
+                else:
+                    self._entries.move_to_end(user_id)
+                    found[user_id] = entry[1]
+        if missing:
+            loaded = self._load(missing)
+            expires_at = now + self.ttl_seconds
+            with self._lock:
+                for user_id in missing:
+                    friends = frozenset(loaded.get(user_id, ()))
+                    found[user_id] = friends
+                    self._entries[user_id] = (expires_at, friends)
+                    self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_users:
+                    self._entries.popitem(last=False)
+        return found
+
+    def are_friends(self, user_id, other_id):
+        return other_id in self.friends(user_id)
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def sample_friends(user_id, friends, limit):
+    # Counting friends of friends costs the sum of the friends' friend counts,
+    # so very large friend lists are ranked from a sample. The sample is seeded
+    # by the user so suggestions stay stable between requests.
+    if len(friends) <= limit:
+        return friends
+    return frozenset(random.Random(user_id).sample(sorted(friends), limit))
+
+
+def mutual_friend_counts(user_id, friends, adjacency, scale=1.0):
+    # Friends of friends who are not already friends, with how many friends
+    # each has in common with the user (scaled up when counted over a sample)
+    counts = Counter(chain.from_iterable(adjacency.get(friend, ()) for friend in friends))
+    counts.pop(user_id, None)
+    for friend in friends:
+        counts.pop(friend, None)
+    if scale != 1.0:
+        for candidate in counts:
+            counts[candidate] *= scale
+    return counts
+
+
+def rank_suggestions(mutual, shared_games, limit, game_weight=0.5):
+    # mutual: {user_id: mutual friends}; shared_games: {user_id: set of games
+    # also played by the user}. A mutual friend counts for more than a shared game.
+    candidates = set(mutual) | set(shared_games)
+    return heapq.nlargest(limit, candidates, key=lambda candidate: (
+        mutual.get(candidate, 0) + game_weight * len(shared_games.get(candidate, ())),
+        mutual.get(candidate, 0),
+        -candidate
+    ))
@@ -0,0 +1,49 @@
+# Production server settings: gunicorn -c gunicorn.conf.py app:app
+# Every setting can be overridden through the environment.
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:' + os.environ.get('PORT', '5000'))
+
+# gthread workers: each process serves requests on a pool of threads, and an
+# open chat stream or a waiting quick-match request holds one of them until it
+# ends. The app caps both per process (CHAT_STREAM_MAX_OPEN streams, 503 past
+# that; QUICK_MATCH_MAX_WAITING waits, answered at once past that) and the pool
+# gets that many threads on top of THREADS, which are left for other requests.
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+stream_threads = int(os.environ.setdefault('CHAT_STREAM_MAX_OPEN', '16'))
+waiting_threads = int(os.environ.setdefault('QUICK_MATCH_MAX_WAITING', '4'))
+threads = int(os.environ.get('THREADS', 8)) + stream_threads + waiting_threads
+
+# Chat streams only receive events published in their own process unless the
+# events go through a shared broker; with several workers they are passed
+# through the database (see CHAT_BROKER in app.py). Set before the app is loaded.
+if workers > 1:
+    os.environ.setdefault('CHAT_BROKER', 'database')
+keepalive = int(os.environ.get('KEEPALIVE', 5))
+timeout = int(os.environ.get('TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', 30))
+max_requests = int(os.environ.get('MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('MAX_REQUESTS_JITTER', 0))
+
+# Import the app and models once in the master before forking
+preload_app = os.environ.get('PRELOAD', '1') == '1'
+
+accesslog = os.environ.get('ACCESS_LOG', '-')
+errorlog = os.environ.get('ERROR_LOG', '-')
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with the workers
+    from app import app, db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    # Write out anything still buffered in memory before the worker goes away
+    from app import flush_pending_writes
+
+    flush_pending_writes()
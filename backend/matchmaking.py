@@ -0,0 +1,258 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import deque
+
+# Base rating per rank tier; divisions ("Gold 2", "Gold II") move within a tier
+RANK_RATINGS = {
+    'iron': 400,
+    'bronze': 800,
+    'silver': 1200,
+    'unranked': 1400,
+    'gold': 1600,
+    'platinum': 2000,
+    'diamond': 2400,
+    'master': 2800,
+    'grandmaster': 3000,
+    'challenger': 3200,
+    'radiant': 3200,
+    'global elite': 3200
+}
+DEFAULT_RATING = RANK_RATINGS['unranked']
+ROMAN_DIVISIONS = {'i': 1, 'ii': 2, 'iii': 3, 'iv': 4}
+
+
+def rank_tier(rank):
+    rank = (rank or '').strip().lower()
+    for tier in sorted(RANK_RATINGS, key=len, reverse=True):
+        if rank.startswith(tier):
+            return tier
+    return None
+
+
+def player_rating(rank, win_rate=None, hours_played=None):
+    tier = rank_tier(rank)
+    rating = RANK_RATINGS[tier] if tier else DEFAULT_RATING
+
+    division = re.search(r'\b(\d|iv|iii|ii|i)$', (rank or '').strip().lower())
+    if tier and division:
+        number = ROMAN_DIVISIONS.get(division.group(1)) or int(division.group(1))
+        rating += (4 - min(max(number, 1), 4)) * 100
+
+    if win_rate is not None:
+        percent = win_rate * 100 if win_rate <= 1 else win_rate
+        rating += (min(max(percent, 0), 100) - 50) * 4
+    if hours_played:
+        rating += min(hours_played, 2000) / 20
+    return rating
+
+
+def region_of(location):
+    # "Los Angeles, CA" -> "ca"
+    return (location or '').rsplit(',', 1)[-1].strip().lower() or None
+
+
+class Player:
+    __slots__ = ('user_id', 'game', 'rating', 'rank', 'role', 'win_rate', 'hours_played', 'region', 'queued_at')
+
+    def __init__(self, user_id, game, rating, rank=None, role=None, win_rate=None,
+                 hours_played=None, region=None, queued_at=None):
+        self.user_id = user_id
+        self.game = game
+        self.rating = rating
+        self.rank = rank
+        self.role = role
+        self.win_rate = win_rate
+        self.hours_played = hours_played
+        self.region = region
+        self.queued_at = queued_at if queued_at is not None else time.monotonic()
+
+
+def compatibility(a, b, window):
+    # 0-100: rating closeness within the current search window dominates,
+    # then same region, complementary roles and similar experience
+    closeness = max(0.0, 1 - abs(a.rating - b.rating) / max(window, 1))
+    same_region = 1.0 if a.region and a.region == b.region else 0.0
+    roles_fit = 1.0 if not a.role or not b.role or a.role != b.role or a.role == 'Flex' else 0.0
+    experience = 1 - min(abs((a.hours_played or 0) - (b.hours_played or 0)) / 2000, 1)
+    return round(70 * closeness + 15 * same_region + 10 * roles_fit + 5 * experience)
+
+
+# Active players bucketed by game, each bucket kept sorted by rating so a search
+# only looks at the neighbourhood of the requester's rating. The search window
+# starts at base_window and widens by widen_per_second for every second the
+# requester has been waiting, up to max_window.
+class MatchmakingIndex:
+    def __init__(self, base_window=200, widen_per_second=25, max_window=1000, max_scan=96):
+        self.base_window = base_window
+        self.widen_per_second = widen_per_second
+        self.max_window = max_window
+        self.max_scan = max_scan
+        self._buckets = {}  # game -> sorted [(rating, user_id)]
+        self._players = {}  # (game, user_id) -> Player
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._players)
+
+    def games(self):
+        with self._lock:
+            return list(self._buckets)
+
+    def get(self, game, user_id):
+        return self._players.get((game, user_id))
+
+    def players(self):
+        with self._lock:
+            return list(self._players.values())
+
+    def add(self, player):
+        with self._lock:
+            existing = self._players.get((player.game, player.user_id))
+            if existing:
+                # Keep the original queue time so the window keeps widening
+                player.queued_at = existing.queued_at
+                self._unlink(existing)
+            self._players[(player.game, player.user_id)] = player
+            bisect.insort(self._buckets.setdefault(player.game, []), (player.rating, player.user_id))
+
+    def remove(self, game, user_id):
+        with self._lock:
+            player = self._players.pop((game, user_id), None)
+            if player:
+                self._unlink(player)
+            return player
+
+    def remove_user(self, user_id):
+        with self._lock:
+            for game in list(self._buckets):
+                self.remove(game, user_id)
+
+    def window_for(self, player, now=None):
+        waited = max((now or time.monotonic()) - player.queued_at, 0)
+        return min(self.base_window + waited * self.widen_per_second, self.max_window)
+
+    def search(self, player, k=10, exclude=(), accept=None, now=None):
+        # Returns up to k (score, Player) pairs, best first
+        window = self.window_for(player, now)
+        with self._lock:
+            bucket = self._buckets.get(player.game, [])
+            low = bisect.bisect_left(bucket, (player.rating, -1)) - 1
+            high = low + 1
+            scanned = 0
+            candidates = []
+            while scanned < self.max_scan and (low >= 0 or high < len(bucket)):
+                # Walk outwards, always taking the closer neighbour next
+                take_low = high >= len(bucket) or (
+                    low >= 0 and player.rating - bucket[low][0] <= bucket[high][0] - player.rating
+                )
+                rating, user_id = bucket[low] if take_low else bucket[high]
+                if take_low:
+                    low -= 1
+                else:
+                    high += 1
+                if abs(rating - player.rating) > window:
+                    if take_low:
+                        low = -1
+                    else:
+                        high = len(bucket)
+                    continue
+
+                scanned += 1
+                if user_id == player.user_id or user_id in exclude:
+                    continue
+                candidate = self._players[(player.game, user_id)]
+                if accept and not accept(candidate):
+                    continue
+                candidates.append((compatibility(player, candidate, window), -abs(rating - player.rating), candidate))
+
+        best = heapq.nlargest(k, candidates, key=lambda entry: (entry[0], entry[1]))
+        return [(score, candidate) for score, _, candidate in best]
+
+    def _unlink(self, player):
+        bucket = self._buckets[player.game]
+        position = bisect.bisect_left(bucket, (player.rating, player.user_id))
+        if position < len(bucket) and bucket[position] == (player.rating, player.user_id):
+            del bucket[position]
+        if not bucket:
+            del self._buckets[player.game]
+
+
+# Quick-match queue. Players wait in their own MatchmakingIndex (once per game
+# they queued for), and pair() (run on a timer) matches them in batches: the longest-waiting player goes
+# first and takes the most compatible partner still unpaired inside their
+# search window, so windows widen until everyone finds a partner.
+class MatchQueue:
+    def __init__(self, index, rate_window_seconds=60):
+        self.index = index
+        self.rate_window_seconds = rate_window_seconds
+        self.pairs_formed = 0
+        self.total_matched_wait = 0.0
+        self._recent_pairs = deque()
+        self._queued = {}  # user_id -> [Player], one per game they queued for
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._queued)
+
+    def enqueue(self, players):
+        # A player waits in every game they asked for; re-queueing for the
+        # same game keeps their place
+        players = list(players)
+        with self._lock:
+            user_id = players[0].user_id
+            games = {player.game for player in players}
+            for current in self._queued.get(user_id, ()):
+                if current.game not in games:
+                    self.index.remove(current.game, user_id)
+            for player in players:
+                self.index.add(player)
+            self._queued[user_id] = players
+            return players
+
+    def leave(self, user_id):
+        with self._lock:
+            players = self._queued.pop(user_id, None)
+            self.index.remove_user(user_id)
+            return players
+
+    def get(self, user_id):
+        return self._queued.get(user_id)
+
+    def pair(self, now=None):
+        now = now or time.monotonic()
+        pairs = []
+        with self._lock:
+            for player in sorted(self.index.players(), key=lambda queued: queued.queued_at):
+                if player.user_id not in self._queued:
+                    continue
+                best = self.index.search(player, k=1, now=now)
+                if not best:
+                    continue
+                score, partner = best[0]
+                pairs.append((score, player, partner))
+                # Drop both right away so later searches in this round skip them
+                for matched in (player, partner):
+                    for queued in self._queued.pop(matched.user_id, ()):
+                        self.index.remove(queued.game, queued.user_id)
+                self.total_matched_wait += (now - player.queued_at) + (now - partner.queued_at)
+                self._recent_pairs.append(now)
+            self.pairs_formed += len(pairs)
+        return pairs
+
+    def stats(self, now=None):
+        now = now or time.monotonic()
+        with self._lock:
+            while self._recent_pairs and self._recent_pairs[0] < now - self.rate_window_seconds:
+                self._recent_pairs.popleft()
+            waiting = [min(player.queued_at for player in players) for players in self._queued.values()]
+            matched_players = self.pairs_formed * 2
+            return {
+                'queueDepth': len(waiting),
+                'averageQueuedWaitSeconds': round(sum(now - queued_at for queued_at in waiting) / len(waiting), 3) if waiting else 0.0,
+                'averageMatchedWaitSeconds': round(self.total_matched_wait / matched_players, 3) if matched_players else 0.0,
+                'pairsFormed': self.pairs_formed,
+                'pairsPerSecond': round(len(self._recent_pairs) / self.rate_window_seconds, 3)
+            }
@@ -0,0 +1,191 @@
+import bisect
+import threading
+import time
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds of the histogram buckets, in seconds and bytes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        # Prometheus buckets are cumulative
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum:.6f}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class RouteStats:
+    __slots__ = ('latency', 'size', 'statuses', 'sql_queries', 'sql_seconds')
+
+    def __init__(self, latency_buckets, size_buckets):
+        self.latency = Histogram(latency_buckets)
+        self.size = Histogram(size_buckets)
+        self.statuses = {}
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Per-route request metrics kept in memory and rendered in the Prometheus text
+# format. Routes are labelled by their URL rule ("/api/videos/<int:video_id>"),
+# not the path, so the number of series stays fixed. SQL statements are timed
+# through engine events and charged to the request running on the same thread;
+# statements from background threads only count towards the totals. Each worker
+# process keeps its own numbers.
+class RequestMetrics:
+    def __init__(self, latency_buckets=LATENCY_BUCKETS, size_buckets=SIZE_BUCKETS, server_timing=True):
+        self.latency_buckets = latency_buckets
+        self.size_buckets = size_buckets
+        self.server_timing = server_timing
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self._routes = {}  # (method, route) -> RouteStats
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        self._local.sql_queries = 0
+        self._local.sql_seconds = 0.0
+
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        sql_queries = self._local.sql_queries
+        sql_seconds = self._local.sql_seconds
+        # Streamed bodies have no length yet; they are timed up to the headers
+        size = None if response.is_streamed else response.content_length
+        rule = request.url_rule
+        self.record(request.method, rule.rule if rule else '<unmatched>', response.status_code,
+                    elapsed, size, sql_queries, sql_seconds)
+
+        if self.server_timing:
+            response.headers.add(
+                'Server-Timing',
+                f'app;dur={elapsed * 1000:.1f}, db;dur={sql_seconds * 1000:.1f};desc="{sql_queries} queries"'
+            )
+        return response
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(self._local, 'query_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        self._local.query_started = None
+        if hasattr(self._local, 'sql_queries'):
+            self._local.sql_queries += 1
+            self._local.sql_seconds += elapsed
+        with self._lock:
+            self.sql_queries += 1
+            self.sql_seconds += elapsed
+
+    def record(self, method, route, status, seconds, size=None, sql_queries=0, sql_seconds=0.0):
+        key = (method, route)
+        with self._lock:
+            stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = RouteStats(self.latency_buckets, self.size_buckets)
+            stats.latency.observe(seconds)
+            if size is not None:
+                stats.size.observe(size)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.sql_queries += sql_queries
+            stats.sql_seconds += sql_seconds
+
+    def render(self, extra=()):
+        # extra: (name, type, help, value) for values owned by other components
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                '# HELP http_requests_total Requests answered, by route and status code',
+                '# TYPE http_requests_total counter'
+            ]
+            for (method, route), stats in routes:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(
+                        f'http_requests_total{{method="{method}",route="{escape_label(route)}",status="{status}"}} {count}'
+                    )
+
+            lines += [
+                '# HELP http_request_duration_seconds Time to produce a response, by route',
+                '# TYPE http_request_duration_seconds histogram'
+            ]
+            for (method, route), stats in routes:
+                lines.extend(stats.latency.samples(
+                    'http_request_duration_seconds', f'method="{method}",route="{escape_label(route)}"'
+                ))
+
+            lines += [
+                '# HELP http_response_size_bytes Response body sizes, by route',
+                '# TYPE http_response_size_bytes histogram'
+            ]
+            for (method, route), stats in routes:
+                if stats.size.count:
+                    lines.extend(stats.size.samples(
+                        'http_response_size_bytes', f'method="{method}",route="{escape_label(route)}"'
+                    ))
+
+            lines += [
+                '# HELP http_request_db_queries_total SQL statements run while answering requests, by route',
+                '# TYPE http_request_db_queries_total counter'
+            ]
+            lines += [
+                f'http_request_db_queries_total{{method="{method}",route="{escape_label(route)}"}} {stats.sql_queries}'
+                for (method, route), stats in routes
+            ]
+            lines += [
+                '# HELP http_request_db_seconds_total Time spent in SQL statements while answering requests, by route',
+                '# TYPE http_request_db_seconds_total counter'
+            ]
+            lines += [
+                f'http_request_db_seconds_total{{method="{method}",route="{escape_label(route)}"}} {stats.sql_seconds:.6f}'
+                for (method, route), stats in routes
+            ]
+
+            lines += [
+                '# HELP db_queries_total SQL statements run by this process',
+                '# TYPE db_queries_total counter',
+                f'db_queries_total {self.sql_queries}',
+                '# HELP db_query_seconds_total Time spent in SQL statements by this process',
+                '# TYPE db_query_seconds_total counter',
+                f'db_query_seconds_total {self.sql_seconds:.6f}'
+            ]
+
+        for name, kind, help_text, value in extra:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+
+# Who is online, kept in memory. Every authenticated request or heartbeat
+# touches a user; users not seen for ttl_seconds are expired. Users are kept
+# in last-seen order, so expiring (and evicting beyond max_users) only ever
+# looks at the oldest entries; the per-game lists are kept in the same order,
+# so the most recently active players of a game are read off the end. Touches
+# are collected until drain() so the database can be updated in one batch.
+class PresenceTracker:
+    def __init__(self, ttl_seconds=90, max_users=200000):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._seen = OrderedDict()  # user_id -> monotonic time, oldest first
+        self._games = {}  # user_id -> tuple of game names
+        self._by_game = defaultdict(OrderedDict)  # game -> user ids, oldest first
+        self._needs_games = set()
+        self._touched = {}  # user_id -> wall clock time, since the last drain
+        self._left = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def touch(self, user_id, games=None):
+        # Returns True if the user just came online
+        with self._lock:
+            came_online = user_id not in self._seen
+            self._seen[user_id] = time.monotonic()
+            self._seen.move_to_end(user_id)
+            self._touched[user_id] = time.time()
+            self._left.discard(user_id)
+            if games is not None:
+                self._set_games(user_id, games)
+            else:
+                for game in self._games.get(user_id, ()):
+                    self._by_game[game].move_to_end(user_id)
+                if came_online:
+                    self._needs_games.add(user_id)
+            while len(self._seen) > self.max_users:
+                self._remove(next(iter(self._seen)))
+            return came_online
+
+    def leave(self, user_id):
+        with self._lock:
+            if user_id in self._seen:
+                self._remove(user_id)
+            self._touched.pop(user_id, None)
+            self._left.add(user_id)
+
+    def is_online(self, user_id):
+        seen = self._seen.get(user_id)
+        return seen is not None and time.monotonic() - seen <= self.ttl_seconds
+
+    def recently_left(self):
+        # Logouts not yet drained, which the database may still show as online
+        with self._lock:
+            return set(self._left)
+
+    def online_for_game(self, game, limit=50):
+        # Most recently active first
+        cutoff = time.monotonic() - self.ttl_seconds
+        users = []
+        with self._lock:
+            for user_id in reversed(self._by_game.get(game, {})):
+                if len(users) >= limit or self._seen[user_id] < cutoff:
+                    break
+                users.append(user_id)
+        return users
+
+    def set_games(self, user_id, games):
+        with self._lock:
+            if user_id in self._seen:
+                self._set_games(user_id, games)
+
+    def users_without_games(self):
+        with self._lock:
+            users, self._needs_games = self._needs_games, set()
+            return users
+
+    def expire(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = 0
+        with self._lock:
+            while self._seen:
+                user_id, seen = next(iter(self._seen.items()))
+                if seen >= cutoff:
+                    break
+                self._remove(user_id)
+                expired += 1
+        return expired
+
+    def drain(self):
+        # Returns ({user_id: last seen epoch seconds}, {user ids that logged out})
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            left, self._left = self._left, set()
+            return touched, left
+
+    def clear(self):
+        with self._lock:
+            self._seen.clear()
+            self._games.clear()
+            self._by_game.clear()
+            self._needs_games.clear()
+            self._touched.clear()
+            self._left.clear()
+
+    def restore(self, touched, left):
+        # Puts back a drained batch that could not be written
+        with self._lock:
+            for user_id, seen in touched.items():
+                if self._touched.get(user_id, 0) < seen:
+                    self._touched[user_id] = seen
+            self._left |= left - set(self._touched)
+
+    def _set_games(self, user_id, games):
+        for game in self._games.pop(user_id, ()):
+            self._discard_game(game, user_id)
+        games = tuple(games)
+        if games:
+            self._games[user_id] = games
+            for game in games:
+                self._by_game[game][user_id] = None
+        self._needs_games.discard(user_id)
+
+    def _discard_game(self, game, user_id):
+        users = self._by_game.get(game)
+        if users is not None:
+            users.pop(user_id, None)
+            if not users:
+                del self._by_game[game]
+
+    def _remove(self, user_id):
+        del self._seen[user_id]
+        for game in self._games.pop(user_id, ()):
+            self._discard_game(game, user_id)
+        self._needs_games.discard(user_id)
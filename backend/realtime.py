@@ -0,0 +1,157 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, user_id, buffer_size):
+        self.user_id = user_id
+        self.closed = False
+        self._queue = queue.Queue(maxsize=buffer_size)
+
+    def offer(self, event):
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+    def get(self, timeout):
+        # Returns None on timeout or once the subscription has been closed
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.closed = True
+        # Drop anything still buffered and wake up a waiting reader
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._queue.put_nowait(None)
+
+
+# Default broker: publishing hands the event straight to the hub in this process.
+# Multi-worker deployments need a broker with the same attach/listen/publish
+# interface that calls the attached handler in every worker when an event is
+# published, such as PollingBroker below or one backed by Redis pub/sub.
+class InProcessBroker:
+    def __init__(self):
+        self._handler = None
+
+    def attach(self, handler):
+        self._handler = handler
+
+    def listen(self):
+        # Called before a stream opens; nothing to start in this process
+        pass
+
+    def publish(self, user_id, event):
+        if self._handler:
+            self._handler(user_id, event)
+
+
+# Broker for several worker processes that share only a database: publish
+# appends the event to the store, and a thread in each process that has open
+# streams polls for events newer than the last one it has seen. The store
+# provides append(user_id, event), latest_id(), read_after(event_id, limit)
+# returning (id, user_id, event) tuples in id order, and purge().
+class PollingBroker:
+    def __init__(self, store, poll_seconds=0.2, purge_seconds=60, batch_size=500):
+        self.store = store
+        self.poll_seconds = poll_seconds
+        self.purge_seconds = purge_seconds
+        self.batch_size = batch_size
+        self._handler = None
+        self._last_id = None
+        self._thread_pid = None
+        self._lock = threading.Lock()
+
+    def attach(self, handler):
+        self._handler = handler
+
+    def listen(self):
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            # Events published before the first stream opened are not replayed
+            self._last_id = self.store.latest_id()
+            self._thread_pid = os.getpid()
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def publish(self, user_id, event):
+        self.store.append(user_id, event)
+
+    def poll(self):
+        delivered = 0
+        while True:
+            events = self.store.read_after(self._last_id, self.batch_size)
+            for event_id, user_id, event in events:
+                self._last_id = event_id
+                if self._handler:
+                    self._handler(user_id, event)
+            delivered += len(events)
+            if len(events) < self.batch_size:
+                return delivered
+
+    def _run(self):
+        purged = time.monotonic()
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                self.poll()
+                if time.monotonic() - purged >= self.purge_seconds:
+                    purged = time.monotonic()
+                    self.store.purge()
+            except Exception as e:
+                logger.warning('Failed to poll chat events: %s', e)
+
+
+class ChatHub:
+    def __init__(self, broker=None, buffer_size=100):
+        self.broker = broker or InProcessBroker()
+        self.buffer_size = buffer_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self.broker.attach(self._deliver)
+
+    def subscribe(self, user_id):
+        self.broker.listen()
+        subscription = Subscription(user_id, self.buffer_size)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id, event):
+        self.broker.publish(user_id, event)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def _deliver(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+
+        for subscription in subscribers:
+            if not subscription.offer(event):
+                # Slow consumer: disconnect it instead of buffering without bound.
+                # The client reconnects and catches up from chat history.
+                self.unsubscribe(subscription)
+                subscription.close()
@@ -0,0 +1,201 @@
+import base64
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import make_response, request
+
+
+# Default backend: a size-bounded, thread-safe LRU held in this process.
+# Backends provide get/set for cached values, which are plain tuples of bytes,
+# str and int, and incr/counter for tag versions. Counters are kept apart from
+# the LRU and never evicted: a version that fell back to 0 would bring entries
+# cached under it back to life.
+class LRUBackend:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def incr(self, key):
+        with self._lock:
+            value = self._counters[key] = self._counters.get(key, 0) + 1
+            return value
+
+    def counter(self, key):
+        return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+def encode_value(value):
+    return json.dumps([
+        {'bytes': base64.b64encode(item).decode()} if isinstance(item, bytes) else item for item in value
+    ])
+
+
+def decode_value(data):
+    return tuple(
+        base64.b64decode(item['bytes']) if isinstance(item, dict) else item for item in json.loads(data)
+    )
+
+
+# Shared backend, so that every worker process reads the same entries and sees
+# every invalidation. client is a redis-py client (redis.Redis.from_url(...)),
+# or anything with its get/set/incr/scan_iter/delete methods. Entries expire
+# through their TTL; counters have none, so run Redis with a volatile-* eviction
+# policy, which leaves them alone.
+class RedisBackend:
+    def __init__(self, client, prefix='gg:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        data = self.client.get(self.prefix + key)
+        return None if data is None else decode_value(data)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, encode_value(value), ex=math.ceil(ttl) if ttl else None)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + 'counter:' + key)
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + 'counter:' + key) or 0)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class ResponseCache:
+    def __init__(self, backend=None, ttls=None):
+        self.backend = backend or LRUBackend()
+        self.ttls = ttls or {}
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    # Invalidation bumps a version number per tag; cache keys embed the current
+    # versions of their tags, so old entries are never read again and age out
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.incr(f'tag:{tag}')
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hitRate': round(hits / total, 4) if total else 0.0
+        }
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def cached(self, name, tags=()):
+        # Caches successful responses of a public GET view, keyed by route and
+        # normalized query args. Tags may reference view kwargs, e.g. 'user:{user_id}'.
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                resolved_tags = [tag.format(**kwargs) for tag in tags]
+                key = self._key(name, resolved_tags)
+
+                entry = self.backend.get(key)
+                if entry is None:
+                    entry = self._compute(key, name, lambda: view(*args, **kwargs))
+                    if not isinstance(entry, tuple):
+                        # Uncacheable (non-200) response, returned as is
+                        return entry
+                else:
+                    self._count(hit=True)
+
+                body, mimetype, etag = entry
+                response = make_response(body)
+                response.mimetype = mimetype
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'no-cache'
+                return response.make_conditional(request)
+            return wrapper
+        return decorator
+
+    def _key(self, name, tags):
+        args = '&'.join(
+            f'{arg}={value.strip()}'
+            for arg, values in sorted(request.args.lists())
+            for value in sorted(values)
+        )
+        versions = ','.join(str(self.backend.counter(f'tag:{tag}')) for tag in tags)
+        return f'response:{name}:{request.path}?{args}#{versions}'
+
+    def _compute(self, key, name, render):
+        # Single flight: concurrent misses on one key wait for the first
+        # request to render instead of all hitting the database
+        with self._inflight_lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            event.wait()
+            entry = self.backend.get(key)
+            if entry is not None:
+                self._count(hit=True)
+                return entry
+
+        self._count(hit=False)
+        try:
+            response = make_response(render())
+            if response.status_code != 200:
+                return response
+            body = response.get_data()
+            entry = (body, response.mimetype, hashlib.md5(body).hexdigest())
+            self.backend.set(key, entry, self.ttls.get(name))
+            return entry
+        finally:
+            if leader:
+                with self._inflight_lock:
+                    self._inflight.pop(key, None)
+                event.set()
@@ -1,6 +1,7 @@
-from app import app, db
+from app import app, init_db, seed_db
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        init_db()
+        seed_db()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,96 @@
+import re
+
+from sqlalchemy import Column, Integer, MetaData, Table, Text, func, literal_column, select
+
+# FTS5 indexes over user and video text. They use the base tables as external
+# content, so the index stores only tokens, and triggers keep them in sync with
+# every write to those tables, including raw SQL ones. prefix='2 3' adds prefix
+# indexes so that typeahead queries such as "pro*" don't walk the whole term list.
+SEARCH_INDEXES = {
+    'user_fts': ('user', ('username', 'bio', 'location')),
+    'video_fts': ('video', ('title', 'description', 'game'))
+}
+
+# Column weights for bm25(); a hit in a name or title counts for most
+BM25_WEIGHTS = {
+    'user_fts': (10.0, 1.0, 2.0),
+    'video_fts': (10.0, 1.0, 4.0)
+}
+
+# Typeahead suggestions show names and titles, so they only match those
+# columns. A two-letter prefix matches a word in most bios and descriptions,
+# and every match has to be scored before the best ones can be kept.
+TYPEAHEAD_COLUMNS = {
+    'user_fts': ('username',),
+    'video_fts': ('title', 'game')
+}
+
+# Kept out of the models' metadata so create_all() never tries to create them
+search_metadata = MetaData()
+user_fts = Table('user_fts', search_metadata, Column('rowid', Integer), *(
+    Column(name, Text) for name in SEARCH_INDEXES['user_fts'][1]
+))
+video_fts = Table('video_fts', search_metadata, Column('rowid', Integer), *(
+    Column(name, Text) for name in SEARCH_INDEXES['video_fts'][1]
+))
+
+
+def search_index_ddl():
+    for index, (table, columns) in SEARCH_INDEXES.items():
+        names = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        yield (
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5({names}, '
+            f"content='{table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        yield (
+            f'CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON "{table}" BEGIN '
+            f'INSERT INTO {index}(rowid, {names}) VALUES (new.id, {new_values}); END'
+        )
+        yield (
+            f'CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON "{table}" BEGIN '
+            f"INSERT INTO {index}({index}, rowid, {names}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        yield (
+            f'CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF {names} ON "{table}" BEGIN '
+            f"INSERT INTO {index}({index}, rowid, {names}) VALUES ('delete', old.id, {old_values}); "
+            f'INSERT INTO {index}(rowid, {names}) VALUES (new.id, {new_values}); END'
+        )
+        # Index whatever the table already holds
+        yield f"INSERT INTO {index}({index}) VALUES ('rebuild')"
+
+
+def match_expression(query):
+    # Every word has to match the start of a token, so results narrow as the
+    # user types: "pro sho" -> "pro"* "sho"*
+    terms = re.findall(r'\w+', query or '')
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def fts_match(index, expression):
+    return literal_column(index.name).op('MATCH')(expression)
+
+
+def fts_rank(index):
+    # Lower (more negative) is a better match
+    return func.bm25(literal_column(index.name), *BM25_WEIGHTS[index.name])
+
+
+def fts_candidates(index, expression, limit=None, columns=None):
+    # Every match with its score. With a limit only the best `limit` matches by
+    # bm25 are kept, which is enough for suggestions but must not be used for
+    # results that can be paged through. columns restricts the match to some
+    # of the indexed columns.
+    if columns:
+        expression = f"{{{' '.join(columns)}}} : ({expression})"
+    candidates = select(
+        index.c.rowid.label('id'),
+        fts_rank(index).label('score')
+    ).where(fts_match(index, expression))
+    if limit is not None:
+        candidates = candidates.order_by(fts_rank(index), index.c.rowid).limit(limit)
+    return candidates.subquery(f'{index.name}_candidates')
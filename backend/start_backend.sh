@@ -1,4 +1,12 @@
 #!/bin/bash
 echo "Starting Flask Backend Server..."
 cd "$(dirname "$0")"
+if [ "$APP_ENV" = "production" ]; then
+    # Apply migrations once, before any worker starts
+    flask --app app init-db || exit 1
+    # Video processing runs in its own process pool, away from the web workers
+    flask --app app process-videos &
+    # Multi-worker server; see gunicorn.conf.py for the tunable environment variables
+    exec gunicorn -c gunicorn.conf.py app:app
+fi
 python3 app.py
@@ -0,0 +1,113 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+from sqlalchemy import event
+
+# The backend is a set of flat modules run from backend/, and app.py reads
+# DATABASE_URL when it is imported, so both are set up before the import
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+DATABASE_DIR = tempfile.mkdtemp(prefix='gg-tests-')
+DATABASE_PATH = os.path.join(DATABASE_DIR, 'test.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DATABASE_PATH}'
+
+import app as backend  # noqa: E402
+
+
+def remove_database():
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.remove(DATABASE_PATH + suffix)
+        except FileNotFoundError:
+            pass
+
+
+@pytest.fixture
+def app_module():
+    # A fresh database and empty in-process caches for every test
+    remove_database()
+    with backend.app.app_context():
+        backend.init_db()
+    backend.response_cache.clear()
+    backend.trending_list.invalidate()
+    backend.auth_cache.clear()
+    backend.friend_graph.clear()
+    backend.presence.tracker.clear()
+    backend.reset_matchmaking_index()
+    yield backend
+    # Nothing a test did should be written out when the process exits
+    backend.presence.tracker.clear()
+    backend.view_counter.flush()
+    with backend.app.app_context():
+        backend.db.session.remove()
+        backend.db.engine.dispose()
+    remove_database()
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def app_context(app_module):
+    with app_module.app.app_context():
+        yield
+
+
+@pytest.fixture
+def make_user(app_module):
+    counter = iter(range(1, 10 ** 9))
+
+    def make_user(username=None, **fields):
+        number = next(counter)
+        username = username or f'player{number}'
+        user = app_module.User(
+            username=username,
+            email=f'{username}@example.com',
+            password_hash='x',
+            **fields
+        )
+        with app_module.app.app_context():
+            app_module.db.session.add(user)
+            app_module.db.session.commit()
+            return user.id
+
+    return make_user
+
+
+@pytest.fixture
+def auth_headers(app_module):
+    def auth_headers(user_id):
+        token = jwt.encode({
+            'user_id': user_id,
+            'exp': datetime.utcnow() + timedelta(days=1)
+        }, app_module.app.config['SECRET_KEY'])
+        return {'Authorization': f'Bearer {token}'}
+
+    return auth_headers
+
+
+@pytest.fixture
+def count_queries(app_module):
+    @contextmanager
+    def count_queries():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app_module.app.app_context():
+            engine = app_module.db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+
+    return count_queries
@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR
+
+
+def test_importing_app_does_no_database_work(tmp_path):
+    # Run from an empty directory, with the default SQLite database, and exit
+    env = {key: value for key, value in os.environ.items() if key != 'DATABASE_URL'}
+    env['PYTHONPATH'] = BACKEND_DIR
+    result = subprocess.run(
+        [sys.executable, '-c', 'import app'],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0
+    assert result.stderr == ''
+    assert not list(tmp_path.rglob('*.db'))
@@ -0,0 +1,81 @@
+import time
+from datetime import datetime, timedelta
+
+import jwt
+
+
+def verify(client, headers):
+    response = client.get('/api/auth/verify', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['user']
+
+
+def user_queries(statements):
+    return [statement for statement in statements if 'FROM user' in statement]
+
+
+def test_a_cached_token_skips_the_user_lookup(client, make_user, auth_headers, count_queries):
+    headers = auth_headers(make_user('ace'))
+    verify(client, headers)
+    with count_queries() as statements:
+        assert verify(client, headers)['username'] == 'ace'
+    assert statements == []
+
+
+def test_a_profile_update_drops_the_cached_user(app_module, client, make_user, auth_headers, count_queries):
+    me = make_user('ace')
+    headers = auth_headers(me)
+    verify(client, headers)
+
+    with app_module.app.app_context():
+        app_module.db.session.get(app_module.User, me).avatar = 'new.png'
+        app_module.db.session.commit()
+    with count_queries() as statements:
+        assert verify(client, headers)['avatar'] == 'new.png'
+    assert len(user_queries(statements)) == 1
+
+    # Fields outside the snapshot leave the cache alone
+    with app_module.app.app_context():
+        app_module.db.session.get(app_module.User, me).bio = 'entry fragger'
+        app_module.db.session.commit()
+    with count_queries() as statements:
+        verify(client, headers)
+    assert statements == []
+
+
+def test_logout_drops_every_cached_token_of_the_user(app_module, client, make_user, auth_headers, count_queries):
+    me = make_user()
+    # Logged in on two devices, with two different tokens
+    phone = auth_headers(me)
+    token = jwt.encode({'user_id': me, 'exp': datetime.utcnow() + timedelta(hours=1)}, app_module.app.config['SECRET_KEY'])
+    laptop = {'Authorization': f'Bearer {token}'}
+    verify(client, phone)
+    verify(client, laptop)
+
+    assert client.post('/api/auth/logout', headers=phone).status_code == 200
+    with count_queries() as statements:
+        verify(client, laptop)
+    assert len(user_queries(statements)) == 1
+
+
+def test_cached_users_expire_after_the_ttl(app_module, client, make_user, auth_headers, count_queries, monkeypatch):
+    monkeypatch.setattr(app_module.auth_cache, 'ttl_seconds', 0.05)
+    headers = auth_headers(make_user())
+    verify(client, headers)
+
+    time.sleep(0.1)
+    with count_queries() as statements:
+        verify(client, headers)
+    assert len(user_queries(statements)) == 1
+
+
+def test_entries_never_outlive_the_token_and_the_oldest_are_evicted(app_module):
+    cache = app_module.AuthCache(ttl_seconds=60, max_entries=2)
+    cache.set('expiring', 1, {'id': 1}, time.time() - 1)
+    assert cache.get('expiring') is None
+
+    for token in ('a', 'b', 'c'):
+        cache.set(token, 2, {'id': 2}, time.time() + 3600)
+    assert [cache.get(token) for token in ('a', 'b', 'c')] == [None, {'id': 2}, {'id': 2}]
+    cache.invalidate_user(2)
+    assert cache.get('b') is None and cache.get('c') is None
@@ -0,0 +1,70 @@
+import realtime
+
+
+def test_database_broker_delivers_events_published_by_another_worker(app_module, make_user):
+    me = make_user()
+    store = app_module.ChatEventStore(retention_seconds=60)
+    # Two hubs sharing one database stand in for two worker processes
+    sender_hub = realtime.ChatHub(broker=realtime.PollingBroker(store))
+    # Its own thread waits an hour between polls; the test polls by hand
+    stream_broker = realtime.PollingBroker(store, poll_seconds=3600)
+    stream_hub = realtime.ChatHub(broker=stream_broker)
+    store.append(me, {'id': 0, 'content': 'sent before the stream opened'})
+    subscription = stream_hub.subscribe(me)
+
+    sender_hub.publish(me, {'id': 1, 'content': 'gg'})
+    sender_hub.publish(me + 1, {'id': 2, 'content': 'not for me'})
+
+    assert stream_broker.poll() == 2
+    assert subscription.get(timeout=0) == {'id': 1, 'content': 'gg'}
+    assert subscription.get(timeout=0) is None
+    assert stream_broker.poll() == 0
+
+
+def test_database_broker_purges_old_events(app_module):
+    store = app_module.ChatEventStore(retention_seconds=0)
+    store.append(1, {'id': 1})
+    store.purge()
+    with app_module.app.app_context():
+        assert app_module.ChatEvent.query.count() == 0
+
+
+def test_database_broker_keeps_delivering_after_a_purge_empties_the_store(app_module, make_user):
+    me = make_user()
+    store = app_module.ChatEventStore(retention_seconds=0)
+    stream_broker = realtime.PollingBroker(store, poll_seconds=3600)
+    stream_hub = realtime.ChatHub(broker=stream_broker)
+    subscription = stream_hub.subscribe(me)
+    for i in range(3):
+        store.append(me, {'id': i})
+    assert stream_broker.poll() == 3
+    for _ in range(3):
+        subscription.get(timeout=0)
+
+    # A quiet period longer than the retention empties the table; the next
+    # event must still get an id above the ones already seen
+    store.purge()
+    store.append(me, {'id': 3, 'content': 'after the purge'})
+    assert stream_broker.poll() == 1
+    assert subscription.get(timeout=0) == {'id': 3, 'content': 'after the purge'}
+
+
+def test_chat_event_table_is_rebuilt_with_autoincrement(app_module):
+    with app_module.app.app_context():
+        db = app_module.db
+        db.session.execute(app_module.text('DROP TABLE chat_event'))
+        db.session.execute(app_module.text(
+            'CREATE TABLE chat_event (id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER NOT NULL, '
+            'payload TEXT NOT NULL, created_at DATETIME)'
+        ))
+        db.session.execute(app_module.text(
+            "INSERT INTO chat_event (id, user_id, payload) VALUES (7, 1, '{}')"
+        ))
+        app_module.migrate_chat_event_autoincrement()
+        db.session.commit()
+
+        store = app_module.ChatEventStore(retention_seconds=0)
+        assert store.read_after(0, 10) == [(7, 1, {})]
+        store.purge()
+        store.append(1, {})
+        assert store.latest_id() == 8
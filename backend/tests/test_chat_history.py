@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def conversation(app_module, make_user, auth_headers):
+    # Seven messages, the middle three sent in the same instant so the
+    # cursor has to fall back on the id to keep their order
+    me, friend = make_user(), make_user()
+    start = datetime(2024, 1, 1, 12, 0)
+    times = [start, start + timedelta(seconds=1)] + [start + timedelta(seconds=2)] * 3 + [
+        start + timedelta(seconds=3), start + timedelta(seconds=4)
+    ]
+    with app_module.app.app_context():
+        for number, created_at in enumerate(times):
+            sender, recipient = (me, friend) if number % 2 else (friend, me)
+            app_module.db.session.add(app_module.ChatMessage(
+                sender_id=sender, recipient_id=recipient,
+                conversation_key=app_module.conversation_key(sender, recipient),
+                content=f'message {number}', created_at=created_at
+            ))
+        # Another conversation is never mixed in
+        stranger = make_user()
+        app_module.db.session.add(app_module.ChatMessage(
+            sender_id=stranger, recipient_id=me, conversation_key=app_module.conversation_key(stranger, me),
+            content='elsewhere', created_at=start + timedelta(seconds=2)
+        ))
+        app_module.db.session.commit()
+    return f'/api/chat/history/{friend}', auth_headers(me)
+
+
+def contents(page):
+    return [message['content'] for message in page['messages']]
+
+
+def test_latest_page_then_before_cursor_walks_back_to_the_start(client, conversation):
+    path, headers = conversation
+    page = client.get(f'{path}?limit=3', headers=headers).get_json()
+    assert contents(page) == ['message 4', 'message 5', 'message 6']
+    assert page['hasMore'] is True
+
+    pages = [contents(page)]
+    while page['hasMore']:
+        page = client.get(f"{path}?limit=3&before={page['cursors']['before']}", headers=headers).get_json()
+        pages.append(contents(page))
+    assert pages == [
+        ['message 4', 'message 5', 'message 6'],
+        ['message 1', 'message 2', 'message 3'],
+        ['message 0'],
+    ]
+
+    # Past the first message: an empty page that keeps the cursor
+    cursor = page['cursors']['before']
+    empty = client.get(f'{path}?limit=3&before={cursor}', headers=headers).get_json()
+    assert (contents(empty), empty['hasMore'], empty['cursors']['before']) == ([], False, cursor)
+
+
+def test_after_cursor_walks_forward_across_equal_timestamps(client, conversation):
+    path, headers = conversation
+    first = client.get(f'{path}?limit=3', headers=headers).get_json()
+    oldest = client.get(f"{path}?limit=3&before={first['cursors']['before']}", headers=headers).get_json()
+
+    page = client.get(f"{path}?limit=2&after={oldest['cursors']['before']}", headers=headers).get_json()
+    pages = [contents(page)]
+    while page['hasMore']:
+        page = client.get(f"{path}?limit=2&after={page['cursors']['after']}", headers=headers).get_json()
+        pages.append(contents(page))
+    assert pages == [
+        ['message 2', 'message 3'],
+        ['message 4', 'message 5'],
+        ['message 6'],
+    ]
+
+    # A page that ends exactly on the last message says there is no more
+    exact = client.get(f"{path}?limit=3&after={oldest['cursors']['after']}", headers=headers).get_json()
+    assert contents(exact) == ['message 4', 'message 5', 'message 6']
+    assert exact['hasMore'] is False
+
+
+@pytest.mark.parametrize('query', [
+    'before=garbage', 'after=garbage', 'before=2024-01-01T12:00:00_x', 'after=notadate_3', 'limit=ten'
+])
+def test_malformed_cursors_are_refused(client, conversation, query):
+    path, headers = conversation
+    response = client.get(f'{path}?{query}', headers=headers)
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'Invalid pagination parameters'}
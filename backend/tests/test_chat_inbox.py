@@ -0,0 +1,39 @@
+def send(client, headers, recipient_id, content):
+    response = client.post('/api/chat/send', headers=headers, json={'recipientId': recipient_id, 'content': content})
+    assert response.status_code == 200
+
+
+def test_unread_counts_follow_messages_and_mark_read(client, make_user, auth_headers):
+    me, alice, bob = make_user(), make_user(), make_user()
+    mine = auth_headers(me)
+    for content in ('gg', 'rematch?'):
+        send(client, auth_headers(alice), me, content)
+    send(client, auth_headers(bob), me, 'hi')
+
+    assert client.get('/api/chat/unread', headers=mine).get_json() == {'unread': 3, 'conversations': 2}
+    inbox = client.get('/api/chat/conversations', headers=mine).get_json()['conversations']
+    assert [(c['user']['id'], c['unreadCount'], c['lastMessage']) for c in inbox] == [
+        (bob, 1, 'hi'), (alice, 2, 'rematch?')
+    ]
+
+    marked = client.post(f'/api/chat/mark-read/{alice}', headers=mine).get_json()
+    assert marked == {'success': True, 'userId': alice, 'marked': 2}
+    assert client.get('/api/chat/unread', headers=mine).get_json() == {'unread': 1, 'conversations': 1}
+    # Marking again finds nothing left
+    assert client.post(f'/api/chat/mark-read/{alice}', headers=mine).get_json()['marked'] == 0
+
+    # Replying does not count against the sender
+    send(client, mine, bob, 'hey')
+    assert client.get('/api/chat/unread', headers=mine).get_json() == {'unread': 1, 'conversations': 1}
+    assert client.get('/api/chat/unread', headers=auth_headers(bob)).get_json() == {'unread': 1, 'conversations': 1}
+
+
+def test_messages_to_yourself_are_never_unread(client, make_user, auth_headers):
+    me = make_user()
+    headers = auth_headers(me)
+    send(client, headers, me, 'note to self')
+    send(client, headers, me, 'another')
+
+    assert client.get('/api/chat/unread', headers=headers).get_json() == {'unread': 0, 'conversations': 0}
+    inbox = client.get('/api/chat/conversations', headers=headers).get_json()['conversations']
+    assert [(c['user']['id'], c['unreadCount'], c['lastMessage']) for c in inbox] == [(me, 0, 'another')]
@@ -0,0 +1,70 @@
+def test_stream_ticket_opens_the_stream_once(client, make_user, auth_headers):
+    me = make_user()
+    response = client.post('/api/chat/stream/ticket', headers=auth_headers(me))
+    assert response.status_code == 200
+    ticket = response.get_json()['ticket']
+
+    stream = client.get(f'/api/chat/stream?ticket={ticket}')
+    assert stream.status_code == 200
+    assert stream.mimetype == 'text/event-stream'
+    assert next(stream.response) == b'retry: 3000\n\n'
+    stream.close()
+
+    assert client.get(f'/api/chat/stream?ticket={ticket}').status_code == 401
+
+
+def test_stream_ticket_expires(app_module, client, make_user, auth_headers):
+    me = make_user()
+    ticket = client.post('/api/chat/stream/ticket', headers=auth_headers(me)).get_json()['ticket']
+    with app_module.app.app_context():
+        app_module.StreamTicket.query.filter_by(id=ticket).update({
+            'expires_at': app_module.datetime.utcnow() - app_module.timedelta(seconds=1)
+        })
+        app_module.db.session.commit()
+
+    assert client.get(f'/api/chat/stream?ticket={ticket}').status_code == 401
+
+
+def test_stream_does_not_take_the_token_in_the_url(client, make_user, auth_headers):
+    token = auth_headers(make_user())['Authorization'][len('Bearer '):]
+    assert client.get(f'/api/chat/stream?access_token={token}').status_code == 401
+
+
+def test_open_streams_are_capped_per_process(app_module, client, make_user, auth_headers, monkeypatch):
+    # Every open stream holds a server thread until it closes
+    monkeypatch.setattr(app_module, 'chat_stream_slots', app_module.threading.BoundedSemaphore(1))
+    headers = auth_headers(make_user())
+
+    first = client.get('/api/chat/stream', headers=headers)
+    assert first.status_code == 200
+    refused = client.get('/api/chat/stream', headers=headers)
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == '5'
+
+    # Closed without being read, the stream still gives its slot back
+    first.close()
+    second = client.get('/api/chat/stream', headers=headers)
+    assert second.status_code == 200
+    second.close()
+    assert app_module.chat_stream_slots.acquire(blocking=False)
+
+
+def test_a_recipient_id_sent_as_a_string_reaches_their_stream(app_module, client, make_user, auth_headers):
+    me, friend = make_user(), make_user()
+    subscription = app_module.chat_hub.subscribe(friend)
+    try:
+        response = client.post('/api/chat/send', json={'recipientId': str(friend), 'content': 'gg'},
+                               headers=auth_headers(me))
+        assert response.status_code == 200
+        event = subscription.get(timeout=1)
+        assert (event['content'], event['recipientId']) == ('gg', friend)
+    finally:
+        app_module.chat_hub.unsubscribe(subscription)
+
+    # A note to yourself is never unread
+    client.post('/api/chat/send', json={'recipientId': str(me), 'content': 'note'}, headers=auth_headers(me))
+    assert client.get('/api/chat/unread', headers=auth_headers(me)).get_json()['unread'] == 0
+
+    for recipient_id in ('abc', None, [friend]):
+        assert client.post('/api/chat/send', json={'recipientId': recipient_id, 'content': 'gg'},
+                           headers=auth_headers(me)).status_code == 400
@@ -0,0 +1,48 @@
+def add_friends(app_module, *pairs):
+    with app_module.app.app_context():
+        for user_id, friend_id in pairs:
+            app_module.add_friendship(user_id, friend_id)
+        app_module.db.session.commit()
+
+
+def test_accepting_a_request_makes_both_users_friends_once(app_module, client, make_user, auth_headers):
+    alice, bob = make_user(), make_user()
+    assert client.post('/api/friends/request', json={'targetUserId': bob},
+                       headers=auth_headers(alice)).status_code == 200
+    # Bob can't send one back while Alice's is pending
+    assert client.post('/api/friends/request', json={'targetUserId': alice},
+                       headers=auth_headers(bob)).status_code == 400
+
+    request_id = client.get('/api/friends/requests', headers=auth_headers(bob)).get_json()['requests'][0]['id']
+    assert client.post(f'/api/friends/accept/{request_id}', headers=auth_headers(bob)).status_code == 200
+    assert client.post(f'/api/friends/accept/{request_id}', headers=auth_headers(bob)).status_code == 400
+
+    for me, friend in ((alice, bob), (bob, alice)):
+        body = client.get('/api/friends', headers=auth_headers(me)).get_json()
+        assert [user['id'] for user in body['friends']] == [friend]
+        assert body['total'] == 1
+    assert client.post('/api/friends/request', json={'targetUserId': alice},
+                       headers=auth_headers(bob)).get_json()['message'] == 'Already friends'
+    with app_module.app.app_context():
+        assert app_module.Friendship.query.count() == 2
+
+
+def test_suggestions_rank_mutual_friends_then_shared_games(app_module, client, make_user, auth_headers):
+    me, bob, carol, dave, erin, frank, grace = (make_user() for _ in range(7))
+    add_friends(app_module, (me, bob), (me, carol), (bob, dave), (carol, dave), (bob, erin), (bob, grace))
+    with app_module.app.app_context():
+        game, = app_module.get_or_create_games(['Valorant'])
+        app_module.db.session.flush()
+        for user_id in (me, frank):
+            app_module.db.session.add(app_module.UserGame(user_id=user_id, game_id=game.id))
+        app_module.db.session.commit()
+    # Someone already asked is not suggested again
+    assert client.post('/api/friends/request', json={'targetUserId': grace},
+                       headers=auth_headers(me)).status_code == 200
+
+    suggestions = client.get('/api/friends/suggestions', headers=auth_headers(me)).get_json()['suggestions']
+    assert [(user['id'], user['mutualFriends'], user['sharedGames']) for user in suggestions] == [
+        (dave, 2, []),
+        (erin, 1, []),
+        (frank, 0, ['Valorant'])
+    ]
@@ -0,0 +1,40 @@
+def find(client, headers, **body):
+    response = client.post('/api/matchmaking/find', json={'game': 'Valorant', **body}, headers=headers)
+    assert response.status_code == 200
+    return [match['id'] for match in response.get_json()['matches']]
+
+
+def add_player(app_module, make_user, rank):
+    user_id = make_user(skill_level=rank)
+    with app_module.app.app_context():
+        app_module.db.session.add(app_module.MatchmakingProfile(user_id=user_id, game='Valorant', rank=rank))
+        app_module.db.session.commit()
+    return user_id
+
+
+def test_find_window_does_not_widen_with_the_age_of_the_index(app_module, client, make_user, auth_headers):
+    me = add_player(app_module, make_user, 'Gold')
+    close = add_player(app_module, make_user, 'Gold')
+    distant = add_player(app_module, make_user, 'Diamond')  # 800 rating points away
+    headers = auth_headers(me)
+
+    assert find(client, headers) == [close]
+    # The index was built long ago
+    app_module.matchmaking_index.get('Valorant', me).queued_at -= 3600
+    assert find(client, headers) == [close]
+    # A client that has been searching for a while gets a wider window
+    assert set(find(client, headers, waitSeconds=30)) == {close, distant}
+
+
+def test_find_sees_players_added_through_other_workers_after_a_rebuild(app_module, client, make_user,
+                                                                       auth_headers, monkeypatch):
+    me = add_player(app_module, make_user, 'Gold')
+    headers = auth_headers(me)
+    assert find(client, headers) == []
+
+    # Written straight to the database, as another worker process would
+    other = add_player(app_module, make_user, 'Gold')
+    assert find(client, headers) == []
+
+    monkeypatch.setitem(app_module.app.config, 'MATCHMAKING_INDEX_SECONDS', 0)
+    assert find(client, headers) == [other]
@@ -0,0 +1,71 @@
+import re
+
+from metrics import RequestMetrics
+
+
+def sample(body, name, **labels):
+    # The value of one sample in the Prometheus text, or None
+    label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    prefix = f'{name}{{{label_text}}} ' if labels else f'{name} '
+    for line in body.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return None
+
+
+def test_server_timing_counts_the_requests_own_queries(app_module, client, make_user, count_queries):
+    with app_module.app.app_context():
+        video = app_module.Video(user_id=make_user(), title='clip', filename='clip.mp4', status='Published')
+        app_module.db.session.add(video)
+        app_module.db.session.commit()
+        video_id = video.id
+
+    with count_queries() as statements:
+        response = client.get(f'/api/videos/{video_id}')
+    assert response.status_code == 200
+    match = re.fullmatch(r'app;dur=([\d.]+), db;dur=([\d.]+);desc="(\d+) queries"', response.headers['Server-Timing'])
+    assert match, response.headers['Server-Timing']
+    assert int(match.group(3)) == len(statements)
+    assert float(match.group(2)) <= float(match.group(1))
+
+
+def test_metrics_count_requests_by_route_and_status(app_module, client):
+    labels = {'method': 'GET', 'route': '/api/videos/<int:video_id>', 'status': '404'}
+    before = sample(client.get('/api/metrics').get_data(as_text=True), 'http_requests_total', **labels) or 0
+    for video_id in (1000, 1001, 1002):
+        assert client.get(f'/api/videos/{video_id}').status_code == 404
+
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert sample(body, 'http_requests_total', **labels) == before + 3
+    # Labelled by the URL rule, not the path
+    assert '/api/videos/1000' not in body
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert sample(body, 'db_queries_total') > 0
+    assert sample(body, 'matchmaking_queue_depth') == 0
+
+
+def test_metrics_token_is_required_when_set(app_module, client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'METRICS_TOKEN', 'scrape-me')
+    assert client.get('/api/metrics').status_code == 401
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer scrape-me'}).status_code == 200
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = RequestMetrics(latency_buckets=(0.01, 0.1), size_buckets=(100,))
+    for seconds in (0.005, 0.05, 0.05, 2.0):
+        metrics.record('GET', '/api/things', 200, seconds, size=50, sql_queries=2, sql_seconds=0.001)
+    metrics.record('GET', '/api/things', 500, 0.5)
+
+    body = metrics.render()
+    route = {'method': 'GET', 'route': '/api/things'}
+    assert sample(body, 'http_requests_total', **route, status=200) == 4
+    assert sample(body, 'http_requests_total', **route, status=500) == 1
+    assert [sample(body, 'http_request_duration_seconds_bucket', **route, le=bound)
+            for bound in ('0.01', '0.1', '+Inf')] == [1, 3, 5]
+    assert sample(body, 'http_request_duration_seconds_count', **route) == 5
+    assert sample(body, 'http_response_size_bytes_count', **route) == 4
+    assert sample(body, 'http_request_db_queries_total', **route) == 8
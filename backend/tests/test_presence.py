@@ -0,0 +1,99 @@
+import time
+
+
+def test_exit_flush_without_activity_runs_no_queries(app_module, count_queries):
+    with count_queries() as statements:
+        app_module.flush_pending_writes()
+    assert statements == []
+
+
+def test_exit_flush_writes_touches_but_leaves_expiry_to_the_flusher(app_module, make_user):
+    online = make_user()
+    stale = make_user(is_online=True)
+    app_module.presence.tracker.touch(online)
+
+    app_module.flush_pending_writes()
+
+    with app_module.app.app_context():
+        assert app_module.db.session.get(app_module.User, online).is_online
+        # Stale rows are switched off by the periodic flush, not on exit
+        assert app_module.db.session.get(app_module.User, stale).is_online
+        app_module.User.query.filter_by(id=stale).update({
+            'last_active': app_module.datetime.utcnow() - app_module.timedelta(hours=1)
+        })
+        app_module.db.session.commit()
+
+    app_module.presence.flush()
+
+    with app_module.app.app_context():
+        assert not app_module.db.session.get(app_module.User, stale).is_online
+        assert app_module.db.session.get(app_module.User, online).is_online
+
+
+def test_heartbeats_and_logouts_reach_the_database_on_flush(app_module, client, make_user, auth_headers):
+    me = make_user()
+    headers = auth_headers(me)
+
+    client.post('/api/presence/heartbeat', json={'games': ['Heartbeat Cup']}, headers=headers)
+    online = client.get('/api/presence/online?game=Heartbeat Cup').get_json()['users']
+    assert [user['id'] for user in online] == [me]
+    with app_module.app.app_context():
+        # Nothing is written per request
+        assert not app_module.db.session.get(app_module.User, me).is_online
+
+    app_module.presence.flush()
+    with app_module.app.app_context():
+        assert app_module.db.session.get(app_module.User, me).is_online
+
+    client.post('/api/auth/logout', headers=headers)
+    assert client.get('/api/presence/online?game=Heartbeat Cup').get_json()['users'] == []
+    app_module.presence.flush()
+    with app_module.app.app_context():
+        assert not app_module.db.session.get(app_module.User, me).is_online
+
+
+def test_tracker_keeps_at_most_max_users_and_expires_them(app_module):
+    tracker = app_module.PresenceTracker(ttl_seconds=0.05, max_users=3)
+    for user_id in range(1, 6):
+        tracker.touch(user_id, ['Valorant'])
+
+    # The least recently seen are dropped first
+    assert len(tracker) == 3
+    assert tracker.online_for_game('Valorant') == [5, 4, 3]
+
+    time.sleep(0.1)
+    assert tracker.online_for_game('Valorant') == []
+    assert tracker.expire() == 3
+    assert len(tracker) == 0
+
+
+def test_online_users_seen_by_another_worker_are_listed_once_flushed(app_module, client, make_user, auth_headers):
+    alice, bob, carol = make_user(), make_user(), make_user()
+    with app_module.app.app_context():
+        game, = app_module.get_or_create_games(['Valorant'])
+        app_module.db.session.flush()
+        for user_id in (alice, bob, carol):
+            app_module.db.session.add(app_module.UserGame(user_id=user_id, game_id=game.id))
+        app_module.db.session.commit()
+
+    # Two writers stand in for two worker processes sharing the database
+    other_worker = app_module.PresenceWriter(app_module.PresenceTracker(ttl_seconds=90), flush_seconds=3600)
+    other_worker.tracker.touch(alice)
+    other_worker.tracker.touch(carol)
+    other_worker.flush(expire=False)
+    client.post('/api/presence/heartbeat', json={'games': ['Valorant']}, headers=auth_headers(bob))
+
+    online = client.get('/api/presence/online?game=Valorant').get_json()['users']
+    # This worker's own users first
+    assert online[0]['id'] == bob
+    assert sorted(user['id'] for user in online) == [alice, bob, carol]
+
+    # A logout here wins over the database until it is flushed, and users
+    # whose rows went stale are not listed
+    client.post('/api/auth/logout', headers=auth_headers(alice))
+    with app_module.app.app_context():
+        app_module.User.query.filter_by(id=carol).update({
+            'last_active': app_module.datetime.utcnow() - app_module.timedelta(hours=1)
+        })
+        app_module.db.session.commit()
+    assert [user['id'] for user in client.get('/api/presence/online?game=Valorant').get_json()['users']] == [bob]
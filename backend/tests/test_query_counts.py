@@ -0,0 +1,94 @@
+import pytest
+
+
+def add_rows(backend, rows):
+    with backend.app.app_context():
+        backend.db.session.add_all(rows)
+        backend.db.session.commit()
+
+
+def query_count(backend, client, count_queries, path, headers):
+    # The first request warms the token cache; the second is the one measured,
+    # with the response caches emptied so that it is computed from the database
+    client.get(path, headers=headers)
+    backend.response_cache.clear()
+    backend.trending_list.invalidate()
+    with count_queries() as statements:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    return len(statements), response.get_json()
+
+
+def seed_trending(backend, make_user, me, rows):
+    add_rows(backend, [
+        backend.Video(user_id=make_user(), title=f'clip {i}', filename=f'clip{i}.mp4',
+                      status='Published', views=i)
+        for i in range(rows)
+    ])
+    return '/api/videos/trending?limit=50'
+
+
+def seed_chat_history(backend, make_user, me, rows):
+    peer = make_user()
+    add_rows(backend, [
+        backend.ChatMessage(
+            sender_id=me if i % 2 else peer,
+            recipient_id=peer if i % 2 else me,
+            conversation_key=backend.conversation_key(me, peer),
+            content=f'message {i}'
+        )
+        for i in range(rows)
+    ])
+    return f'/api/chat/history/{peer}?limit=100'
+
+
+def seed_match_history(backend, make_user, me, rows):
+    add_rows(backend, [
+        backend.MatchHistory(user1_id=me, user2_id=make_user(), game='Valorant', compatibility_score=80)
+        for _ in range(rows)
+    ])
+    return '/api/matchmaking/history'
+
+
+def seed_friend_requests(backend, make_user, me, rows):
+    add_rows(backend, [
+        backend.FriendRequest(sender_id=make_user(), recipient_id=me)
+        for _ in range(rows)
+    ])
+    return '/api/friends/requests'
+
+
+def seed_my_tournaments(backend, make_user, me, rows):
+    with backend.app.app_context():
+        tournaments = [backend.Tournament(name=f'Cup {i}', game='Valorant') for i in range(rows)]
+        backend.db.session.add_all(tournaments)
+        backend.db.session.flush()
+        backend.db.session.add_all([
+            backend.TournamentRegistration(user_id=me, tournament_id=tournament.id)
+            for tournament in tournaments
+        ])
+        backend.db.session.commit()
+    return '/api/tournaments/my-tournaments'
+
+
+@pytest.mark.parametrize('seed, items', [
+    (seed_trending, 'videos'),
+    (seed_chat_history, 'messages'),
+    (seed_match_history, 'matches'),
+    (seed_friend_requests, 'requests'),
+    (seed_my_tournaments, 'tournaments')
+])
+def test_list_endpoint_query_count_does_not_grow_with_rows(app_module, client, make_user, auth_headers,
+                                                           count_queries, seed, items):
+    counts = []
+    listed = []
+    for rows in (3, 30):
+        # A separate user per size, so the larger list does not include the smaller one
+        me = make_user()
+        path = seed(app_module, make_user, me, rows)
+        count, body = query_count(app_module, client, count_queries, path, auth_headers(me))
+        counts.append(count)
+        listed.append(len(body[items]))
+    # Trending is one shared list, so its second size also lists the first 3 videos
+    assert listed == ([3, 33] if seed is seed_trending else [3, 30])
+    assert counts[0] == counts[1]
@@ -0,0 +1,22 @@
+from sqlalchemy import text
+
+
+def test_hot_queries_use_indexes(app_module, app_context):
+    assert app_module.table_scans() == []
+
+
+def test_a_dropped_index_is_reported(app_module, app_context):
+    app_module.db.session.execute(text('DROP INDEX ix_chat_message_conversation'))
+    app_module.db.session.commit()
+    assert 'chat.history' in {scan.split(':')[0] for scan in app_module.table_scans()}
+
+
+def test_quick_match_claims_look_players_up_by_user(app_module, app_context):
+    # The status index also matches, but walks the whole queue for every claim
+    plan = app_module.explain_query_plan(app_module.hot_queries()['matchmaking.claim'])
+    assert any('ix_quick_match_entry_user_status' in detail for detail in plan)
+
+
+def test_search_by_game_checks_the_full_text_query_the_route_runs(app_module, app_context):
+    plan = app_module.explain_query_plan(app_module.hot_queries()['users.search_by_game'])
+    assert any('user_fts' in detail for detail in plan)
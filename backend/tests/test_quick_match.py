@@ -0,0 +1,128 @@
+import pytest
+
+
+@pytest.fixture
+def matchmaker(app_module, monkeypatch):
+    # No background pairing loop and no waiting: the tests pair by hand
+    monkeypatch.setattr(app_module.quick_matchmaker, 'start', lambda: None)
+    monkeypatch.setitem(app_module.app.config, 'QUICK_MATCH_WAIT_SECONDS', 0)
+
+    def another_worker():
+        # A second matchmaker shares nothing with the first but the database
+        return app_module.QuickMatchmaker(1, 300, 90, 16)
+
+    return another_worker
+
+
+def queue(client, headers):
+    response = client.post('/api/matchmaking/quick', json={'game': 'Valorant'}, headers=headers)
+    assert response.status_code == 202
+    assert response.get_json()['status'] == 'queued'
+
+
+def status(client, headers):
+    return client.get('/api/matchmaking/queue', headers=headers).get_json()
+
+
+def test_players_queued_through_different_workers_are_paired(app_module, client, make_user, auth_headers, matchmaker):
+    alice, bob = make_user(skill_level='Gold'), make_user(skill_level='Gold')
+    queue(client, auth_headers(alice))
+    queue(client, auth_headers(bob))
+
+    assert matchmaker().pair() == 1
+    assert status(client, auth_headers(alice))['match']['id'] == bob
+    assert status(client, auth_headers(bob))['match']['id'] == alice
+    with app_module.app.app_context():
+        assert app_module.MatchHistory.query.filter_by(match_type='quick_match').count() == 1
+
+    # Nothing is left for a loop in another worker to pair again
+    assert matchmaker().pair() == 0
+
+
+def test_a_pair_is_claimed_only_if_both_players_are_still_queued(app_module, client, make_user, auth_headers,
+                                                                 matchmaker):
+    alice, bob, carol = (make_user(skill_level='Gold') for _ in range(3))
+    for user_id in (alice, bob, carol):
+        queue(client, auth_headers(user_id))
+    loop = matchmaker()
+    now = app_module.datetime.utcnow()
+
+    with app_module.app.app_context():
+        # Another loop matched Bob after this one read the queue
+        assert loop.claim((bob,), now)
+        assert not loop.claim((alice, bob), now)
+        assert loop.claim((alice, carol), now)
+        app_module.db.session.commit()
+        statuses = {entry.user_id: entry.status for entry in app_module.QuickMatchEntry.query}
+    assert statuses == {alice: 'matched', bob: 'matched', carol: 'matched'}
+
+    with app_module.app.app_context():
+        app_module.QuickMatchEntry.query.filter_by(user_id=carol).update({'status': 'queued'})
+        app_module.db.session.commit()
+        assert not loop.claim((carol, alice), now)
+        app_module.db.session.commit()
+        # The failed claim did not take Carol out of the queue
+        assert app_module.db.session.query(app_module.QuickMatchEntry.status).filter_by(user_id=carol).scalar() == 'queued'
+
+
+def test_a_batch_with_a_pair_claimed_elsewhere_is_claimed_pair_by_pair(app_module, client, make_user, auth_headers,
+                                                                     matchmaker):
+    alice, bob, carol, dave = (make_user(skill_level='Gold') for _ in range(4))
+    for user_id in (alice, bob, carol, dave):
+        queue(client, auth_headers(user_id))
+    loop = matchmaker()
+    now = app_module.datetime.utcnow()
+    players = {user_id: app_module.Player(user_id, 'Valorant', 1600) for user_id in (alice, bob, carol, dave)}
+
+    with app_module.app.app_context():
+        entry_ids = {
+            user_id: [entry_id]
+            for entry_id, user_id in app_module.db.session.query(app_module.QuickMatchEntry.id,
+                                                                 app_module.QuickMatchEntry.user_id)
+        }
+        # Another loop matched Bob after this one read the queue
+        assert loop.claim((bob,), now)
+        claimed = loop.claim_pairs([(90, players[alice], players[bob]), (90, players[carol], players[dave])],
+                                   entry_ids, now)
+        app_module.db.session.commit()
+        statuses = {entry.user_id: entry.status for entry in app_module.QuickMatchEntry.query}
+
+    assert [(player.user_id, partner.user_id) for _, player, partner in claimed] == [(carol, dave)]
+    assert statuses == {alice: 'queued', bob: 'matched', carol: 'matched', dave: 'matched'}
+
+
+def test_players_without_polls_or_heartbeats_are_dropped(app_module, client, make_user, auth_headers, matchmaker):
+    gone, polling = make_user(skill_level='Iron'), make_user(skill_level='Radiant')
+    queue(client, auth_headers(gone))
+    queue(client, auth_headers(polling))
+    long_ago = app_module.datetime.utcnow() - app_module.timedelta(minutes=5)
+    with app_module.app.app_context():
+        app_module.QuickMatchEntry.query.update({'queued_at': long_ago})
+        app_module.User.query.filter_by(id=gone).update({'last_active': long_ago})
+        app_module.User.query.filter_by(id=polling).update({'last_active': app_module.datetime.utcnow()})
+        app_module.db.session.commit()
+
+    # Too far apart in rating to be paired with each other
+    assert matchmaker().pair() == 0
+    with app_module.app.app_context():
+        assert [entry.user_id for entry in app_module.QuickMatchEntry.query] == [polling]
+
+
+def test_leaving_the_queue(client, make_user, auth_headers, matchmaker):
+    me = make_user()
+    headers = auth_headers(me)
+    queue(client, headers)
+    assert client.delete('/api/matchmaking/queue', headers=headers).status_code == 200
+    assert status(client, headers) == {'status': 'idle'}
+    assert client.delete('/api/matchmaking/queue', headers=headers).status_code == 404
+
+
+def test_quick_match_answers_at_once_when_every_wait_slot_is_taken(app_module, client, make_user, auth_headers,
+                                                                   matchmaker, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'QUICK_MATCH_WAIT_SECONDS', 30)
+    monkeypatch.setattr(app_module, 'quick_match_wait_slots', app_module.threading.BoundedSemaphore(1))
+    app_module.quick_match_wait_slots.acquire()
+
+    started = app_module.time.monotonic()
+    queue(client, auth_headers(make_user()))
+    assert app_module.time.monotonic() - started < 5
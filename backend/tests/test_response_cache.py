@@ -0,0 +1,172 @@
+import fnmatch
+import threading
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+from response_cache import LRUBackend, RedisBackend, ResponseCache
+
+
+class DictRedis:
+    # Local stand-in for a redis-py client: the methods RedisBackend uses,
+    # with values returned as bytes the way Redis returns them
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at < time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def set(self, key, value, ex=None):
+        value = value.encode() if isinstance(value, str) else value
+        self.data[key] = (value, time.monotonic() + ex if ex else None)
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self.data[key] = (str(value).encode(), None)
+        return value
+
+    def scan_iter(self, match):
+        return [key for key in list(self.data) if fnmatch.fnmatch(key, match)]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+def make_app(cache, render=None):
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/things/<int:thing_id>')
+    @cache.cached('things', tags=('things', 'thing:{thing_id}'))
+    def get_thing(thing_id):
+        calls.append(thing_id)
+        if render:
+            return render(thing_id)
+        if thing_id == 404:
+            return jsonify({'message': 'not found'}), 404
+        return jsonify({'id': thing_id, 'version': len(calls)})
+
+    return app, calls
+
+
+@pytest.fixture(params=['lru', 'redis'])
+def backend(request):
+    return LRUBackend(16) if request.param == 'lru' else RedisBackend(DictRedis())
+
+
+def test_hits_and_misses_are_counted(backend):
+    cache = ResponseCache(backend)
+    app, calls = make_app(cache)
+    client = app.test_client()
+
+    first = client.get('/things/1?b=2&a=1')
+    # The same query args in another order are the same entry
+    second = client.get('/things/1?a=1&b=2')
+    assert first.get_json() == second.get_json() == {'id': 1, 'version': 1}
+    assert calls == [1]
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'hitRate': 0.5}
+
+    # Errors are passed through and not cached
+    assert client.get('/things/404').status_code == 404
+    assert client.get('/things/404').status_code == 404
+    assert calls == [1, 404, 404]
+
+
+def test_invalidating_a_tag_recomputes_only_its_entries(backend):
+    cache = ResponseCache(backend)
+    app, calls = make_app(cache)
+    client = app.test_client()
+    client.get('/things/1')
+    client.get('/things/2')
+
+    cache.invalidate('thing:1')
+    assert client.get('/things/1').get_json()['version'] == 3
+    assert client.get('/things/2').get_json()['version'] == 2
+
+    cache.invalidate('things')
+    client.get('/things/1')
+    client.get('/things/2')
+    assert calls == [1, 2, 1, 1, 2]
+
+
+def test_tag_versions_are_never_evicted():
+    backend = LRUBackend(max_entries=2)
+    backend.incr('tag:things')
+    for i in range(10):
+        backend.set(f'response:{i}', (b'x', 'text/plain', 'etag'))
+    assert backend.counter('tag:things') == 1
+    assert backend.get('response:0') is None
+
+
+def test_concurrent_misses_render_once(backend):
+    started = threading.Event()
+    release = threading.Event()
+
+    def render(thing_id):
+        started.set()
+        release.wait(5)
+        return jsonify({'id': thing_id})
+
+    cache = ResponseCache(backend)
+    app, calls = make_app(cache, render)
+    responses = []
+
+    def request():
+        responses.append(app.test_client().get('/things/7'))
+
+    threads = [threading.Thread(target=request) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    time.sleep(0.1)  # let the others queue up behind the first
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [7]
+    assert [response.get_json() for response in responses] == [{'id': 7}] * 5
+    assert cache.stats()['misses'] == 1
+
+
+def test_etag_answers_if_none_match_with_304(backend):
+    cache = ResponseCache(backend)
+    app, _ = make_app(cache)
+    client = app.test_client()
+
+    response = client.get('/things/1')
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    not_modified = client.get('/things/1', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b''
+
+    cache.invalidate('things')
+    changed = client.get('/things/1', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_workers_sharing_a_redis_backend_see_each_others_entries_and_invalidations():
+    redis = DictRedis()
+    # Two caches stand in for two worker processes
+    first, second = ResponseCache(RedisBackend(redis)), ResponseCache(RedisBackend(redis))
+    first_app, first_calls = make_app(first)
+    second_app, second_calls = make_app(second)
+
+    first_app.test_client().get('/things/1')
+    assert second_app.test_client().get('/things/1').get_json()['version'] == 1
+    assert second_calls == []
+
+    first.invalidate('thing:1')
+    second_app.test_client().get('/things/1')
+    assert second_calls == [1]
+
+    second.clear()
+    assert redis.data == {}
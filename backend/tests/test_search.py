@@ -0,0 +1,71 @@
+import warnings
+
+
+def add_users(app_module, usernames):
+    with app_module.app.app_context():
+        app_module.db.session.execute(app_module.db.insert(app_module.User), [
+            {'username': username, 'email': f'{username}@example.com', 'password_hash': 'x'}
+            for username in usernames
+        ])
+        app_module.db.session.commit()
+
+
+def test_search_pages_through_every_match(app_module, client):
+    # More prefix matches than SEARCH_MAX_CANDIDATES, with the shortest name last
+    add_users(app_module, [f'progamer{i}' for i in range(1500)] + ['pro', 'someone'])
+
+    found = []
+    page = 1
+    while True:
+        body = client.get(f'/api/users/search?q=pro&page={page}&per_page=50').get_json()
+        found += [user['username'] for user in body['users']]
+        if not body['pagination']['hasMore']:
+            break
+        page += 1
+
+    assert len(found) == len(set(found)) == 1501
+    assert 'pro' in found
+    assert 'someone' not in found
+
+
+def test_typeahead_ranks_matches_before_capping_them(app_module, client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'SEARCH_MAX_CANDIDATES', 10)
+    # The best match by bm25 (the whole name) comes after the cap in rowid order
+    add_users(app_module, [f'pro_team_player_{i}' for i in range(50)] + ['pro'])
+
+    body = client.get('/api/search/typeahead?q=pro&limit=1').get_json()
+    assert [user['username'] for user in body['users']] == ['pro']
+
+
+def test_typeahead_matches_names_only(app_module, client):
+    with app_module.app.app_context():
+        app_module.db.session.execute(app_module.db.insert(app_module.User), [
+            {'username': 'player1', 'email': 'player1@example.com', 'password_hash': 'x',
+             'bio': 'pro player looking for a team'},
+            {'username': 'progamer', 'email': 'progamer@example.com', 'password_hash': 'x'}
+        ])
+        app_module.db.session.commit()
+
+    suggested = client.get('/api/search/typeahead?q=pro').get_json()['users']
+    assert [user['username'] for user in suggested] == ['progamer']
+    # Search still finds bio matches
+    found = client.get('/api/users/search?q=pro').get_json()['users']
+    assert {user['username'] for user in found} == {'player1', 'progamer'}
+
+
+def test_search_by_game_ranks_online_players_first_without_warnings(app_module, client):
+    with app_module.app.app_context():
+        app_module.db.session.execute(app_module.db.insert(app_module.User), [
+            {'username': f'pro{i}', 'email': f'pro{i}@example.com', 'password_hash': 'x', 'is_online': i == 2}
+            for i in range(4)
+        ])
+        game, = app_module.get_or_create_games(['Valorant'])
+        app_module.db.session.flush()
+        for user in app_module.User.query.filter(app_module.User.username.in_(['pro1', 'pro2'])):
+            app_module.db.session.add(app_module.UserGame(user_id=user.id, game_id=game.id))
+        app_module.db.session.commit()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        found = client.get('/api/users/search?q=pro&game=Valorant').get_json()['users']
+    assert [user['username'] for user in found] == ['pro2', 'pro1']
@@ -0,0 +1,26 @@
+def test_updating_a_video_keeps_views_counted_since_it_was_loaded(app_module, make_user):
+    with app_module.app.app_context():
+        video = app_module.Video(user_id=make_user(), title='clip', filename='clip.mp4',
+                                 status='Published', views=10, likes=1)
+        app_module.db.session.add(video)
+        app_module.db.session.commit()
+        video_id = video.id
+
+    with app_module.app.app_context():
+        video = app_module.db.session.get(app_module.Video, video_id)
+        assert video.trending_score == 20
+
+        # Views counted by another request while this one holds the object
+        for _ in range(5):
+            app_module.view_counter.add(video_id)
+        app_module.view_counter.flush()
+
+        video.title = 'renamed clip'
+        app_module.db.session.commit()
+
+        video = app_module.db.session.get(app_module.Video, video_id)
+        assert (video.views, video.trending_score) == (15, 25)
+
+        video.likes = 3
+        app_module.db.session.commit()
+        assert app_module.db.session.get(app_module.Video, video_id).trending_score == 45
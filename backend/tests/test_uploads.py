@@ -0,0 +1,240 @@
+import hashlib
+import os
+import time
+
+import pytest
+
+from uploads import FileRange
+
+
+@pytest.fixture
+def upload_folder(app_module, monkeypatch, tmp_path):
+    monkeypatch.setitem(app_module.app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    return tmp_path
+
+
+def start(client, headers, data, chunk_size, sha256=None):
+    response = client.post('/api/videos/uploads', headers=headers, json={
+        'filename': 'clip.mp4', 'size': len(data), 'chunkSize': chunk_size,
+        'sha256': sha256 or hashlib.sha256(data).hexdigest(), 'title': 'Clutch'
+    })
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def put_chunk(client, headers, upload_id, data, chunk_size, index):
+    chunk = data[index * chunk_size:(index + 1) * chunk_size]
+    return client.put(f'/api/videos/uploads/{upload_id}/chunks/{index}', data=chunk, headers=headers)
+
+
+def complete(client, headers, upload_id, timeout=10):
+    # Verification runs in the background; poll the session like a client would
+    response = client.post(f'/api/videos/uploads/{upload_id}/complete', headers=headers)
+    if response.status_code != 202:
+        return response.status_code, response.get_json()
+    deadline = time.monotonic() + timeout
+    status = response.get_json()
+    while status['status'] == 'verifying' and time.monotonic() < deadline:
+        time.sleep(0.01)
+        status = client.get(f'/api/videos/uploads/{upload_id}', headers=headers).get_json()
+    return 202, status
+
+
+def test_chunks_sent_out_of_order_make_the_video(app_module, client, make_user, auth_headers, upload_folder):
+    headers = auth_headers(make_user())
+    data = os.urandom(10000)
+    upload = start(client, headers, data, 3000)
+    assert upload['chunkCount'] == 4
+
+    for index in (3, 1, 0, 2):
+        response = put_chunk(client, headers, upload['uploadId'], data, 3000, index)
+        assert response.status_code == 200
+        assert response.get_json()['sha256'] == hashlib.sha256(data[index * 3000:(index + 1) * 3000]).hexdigest()
+
+    code, status = complete(client, headers, upload['uploadId'])
+    assert code == 202
+    assert status['status'] == 'complete'
+    assert status['error'] is None
+    with app_module.app.app_context():
+        video = app_module.db.session.get(app_module.Video, status['videoId'])
+        assert video.status == 'Processing'
+        assert app_module.VideoJob.query.filter_by(video_id=video.id).count() == 1
+    assert (upload_folder / video.filename).read_bytes() == data
+    assert not list(upload_folder.glob('*.part'))
+
+    # Completing again just answers with the video
+    again = client.post(f"/api/videos/uploads/{upload['uploadId']}/complete", headers=headers)
+    assert again.status_code == 200
+    assert again.get_json()['video_id'] == video.id
+
+
+def test_an_interrupted_upload_resumes_with_the_missing_chunks(client, make_user, auth_headers, upload_folder):
+    headers = auth_headers(make_user())
+    data = os.urandom(5000)
+    upload = start(client, headers, data, 1000)
+    for index in (0, 2, 4):
+        put_chunk(client, headers, upload['uploadId'], data, 1000, index)
+    # A chunk sent twice is only counted once
+    put_chunk(client, headers, upload['uploadId'], data, 1000, 2)
+
+    code, status = complete(client, headers, upload['uploadId'])
+    assert code == 409
+    assert status['missingChunks'] == [1, 3]
+
+    status = client.get(f"/api/videos/uploads/{upload['uploadId']}", headers=headers).get_json()
+    assert status['receivedChunks'] == 3
+    for index in status['missingChunks']:
+        put_chunk(client, headers, upload['uploadId'], data, 1000, index)
+    assert complete(client, headers, upload['uploadId'])[1]['status'] == 'complete'
+
+
+def test_chunks_of_the_wrong_size_or_checksum_are_refused(client, make_user, auth_headers, upload_folder):
+    headers = auth_headers(make_user())
+    data = os.urandom(2500)
+    upload = start(client, headers, data, 1000)
+    path = f"/api/videos/uploads/{upload['uploadId']}/chunks"
+
+    assert client.put(f'{path}/2', data=data[:1000], headers=headers).status_code == 400
+    assert client.put(f'{path}/3', data=data[:500], headers=headers).status_code == 400
+    assert client.put(f'{path}/0', data=data[:1000], headers={**headers, 'X-Chunk-SHA256': '0' * 64}).status_code == 422
+
+
+def test_a_file_checksum_mismatch_sends_every_chunk_back(app_module, client, make_user, auth_headers, upload_folder):
+    headers = auth_headers(make_user())
+    data = os.urandom(3000)
+    upload = start(client, headers, data, 1000, sha256=hashlib.sha256(b'something else').hexdigest())
+    for index in range(3):
+        put_chunk(client, headers, upload['uploadId'], data, 1000, index)
+
+    code, status = complete(client, headers, upload['uploadId'])
+    assert code == 202
+    assert status['status'] == 'uploading'
+    assert 'checksum mismatch' in status['error']
+    assert status['missingChunks'] == [0, 1, 2]
+    with app_module.app.app_context():
+        assert app_module.Video.query.count() == 0
+
+
+def test_a_failed_verification_leaves_the_upload_ready_to_complete_again(app_module, client, make_user, auth_headers,
+                                                                         upload_folder, monkeypatch):
+    headers = auth_headers(make_user())
+    data = os.urandom(2000)
+    upload = start(client, headers, data, 1000)
+    for index in range(2):
+        put_chunk(client, headers, upload['uploadId'], data, 1000, index)
+
+    def broken_disk(path, block_size):
+        raise OSError('I/O error')
+
+    file_sha256 = app_module.file_sha256
+    monkeypatch.setattr(app_module, 'file_sha256', broken_disk)
+    code, status = complete(client, headers, upload['uploadId'])
+    assert status['status'] == 'uploading'
+    assert 'I/O error' in status['error']
+    assert status['missingChunks'] == []
+
+    monkeypatch.setattr(app_module, 'file_sha256', file_sha256)
+    assert complete(client, headers, upload['uploadId'])[1]['status'] == 'complete'
+
+
+def test_a_verification_left_by_a_dead_worker_is_restarted(app_module, client, make_user, auth_headers, upload_folder):
+    headers = auth_headers(make_user())
+    data = os.urandom(1000)
+    upload = start(client, headers, data, 1000)
+    put_chunk(client, headers, upload['uploadId'], data, 1000, 0)
+    with app_module.app.app_context():
+        app_module.UploadSession.query.filter_by(id=upload['uploadId']).update({'status': 'verifying'})
+        app_module.db.session.commit()
+
+    # Still within UPLOAD_VERIFY_TIMEOUT: somebody else is verifying it
+    code, status = complete(client, headers, upload['uploadId'], timeout=0)
+    assert (code, status['status']) == (202, 'verifying')
+
+    with app_module.app.app_context():
+        app_module.UploadSession.query.filter_by(id=upload['uploadId']).update({
+            'updated_at': app_module.datetime.utcnow() - app_module.timedelta(hours=1)
+        })
+        app_module.db.session.commit()
+    assert complete(client, headers, upload['uploadId'])[1]['status'] == 'complete'
+
+
+def test_stale_uploads_are_purged(app_module, client, make_user, auth_headers, upload_folder):
+    headers = auth_headers(make_user())
+    data = os.urandom(2000)
+    stale = start(client, headers, data, 1000)
+    fresh = start(client, headers, data, 1000)
+    put_chunk(client, headers, stale['uploadId'], data, 1000, 0)
+    with app_module.app.app_context():
+        app_module.UploadSession.query.filter_by(id=stale['uploadId']).update({
+            'updated_at': app_module.datetime.utcnow() - app_module.timedelta(hours=25)
+        })
+        app_module.db.session.commit()
+        stale_part = app_module.upload_part_path(app_module.db.session.get(app_module.UploadSession, stale['uploadId']))
+
+        assert app_module.purge_stale_uploads() == 1
+        assert app_module.db.session.get(app_module.UploadSession, stale['uploadId']) is None
+        assert app_module.UploadChunk.query.filter_by(session_id=stale['uploadId']).count() == 0
+    assert not os.path.exists(stale_part)
+    assert client.get(f"/api/videos/uploads/{fresh['uploadId']}", headers=headers).status_code == 200
+
+
+def test_a_range_is_served_as_206_from_the_file(app_module, client, upload_folder):
+    data = os.urandom(4096)
+    (upload_folder / 'clip.mp4').write_bytes(data)
+
+    response = client.get('/uploads/clip.mp4', headers={'Range': 'bytes=100-1099'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == 'bytes 100-1099/4096'
+    assert response.headers['Content-Length'] == '1000'
+    assert response.get_data() == data[100:1100]
+
+    suffix = client.get('/uploads/clip.mp4', headers={'Range': 'bytes=-96'})
+    assert suffix.headers['Content-Range'] == 'bytes 4000-4095/4096'
+    assert suffix.get_data() == data[4000:]
+
+    whole = client.get('/uploads/clip.mp4')
+    assert whole.status_code == 200
+    assert whole.get_data() == data
+
+
+def test_a_range_past_the_end_is_416(client, upload_folder):
+    (upload_folder / 'clip.mp4').write_bytes(os.urandom(1000))
+    response = client.get('/uploads/clip.mp4', headers={'Range': 'bytes=5000-6000'})
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == 'bytes */1000'
+
+
+def test_an_unchanged_file_answers_if_none_match_with_304(client, upload_folder):
+    (upload_folder / 'clip.mp4').write_bytes(os.urandom(1000))
+    response = client.get('/uploads/clip.mp4')
+    etag = response.headers['ETag']
+    assert 'max-age' in response.headers['Cache-Control']
+
+    not_modified = client.get('/uploads/clip.mp4', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b''
+
+
+def test_files_outside_the_folder_and_partial_uploads_are_not_served(client, upload_folder):
+    (upload_folder / 'uploads').mkdir()
+    (upload_folder / 'uploads' / 'abc.part').write_bytes(b'in progress')
+    (upload_folder.parent / 'secret.txt').write_bytes(b'secret')
+
+    assert client.get('/uploads/uploads/abc.part').status_code == 404
+    assert client.get('/uploads/../secret.txt').status_code == 404
+    assert client.get('/uploads/%2e%2e/secret.txt').status_code == 404
+    assert client.get('/uploads/missing.mp4').status_code == 404
+
+
+def test_file_range_stops_at_the_end_of_the_range(tmp_path):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(bytes(range(256)))
+    body = FileRange(str(path), 10, 20)
+    try:
+        # A server using sendfile() starts from the current offset of fileno()
+        assert os.lseek(body.fileno(), 0, os.SEEK_CUR) == 10
+        assert body.read(15) == bytes(range(10, 25))
+        assert body.read() == bytes(range(25, 30))
+        assert body.read() == b''
+    finally:
+        body.close()
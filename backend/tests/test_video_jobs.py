@@ -0,0 +1,105 @@
+import struct
+
+import pytest
+
+
+def mp4(duration_seconds):
+    # The smallest file the MP4 header reader accepts: ftyp, then moov > mvhd
+    mvhd = bytes(4) + struct.pack('>IIII', 0, 0, 1000, int(duration_seconds * 1000)) + bytes(80)
+    mvhd = struct.pack('>I4s', 8 + len(mvhd), b'mvhd') + mvhd
+    moov = struct.pack('>I4s', 8 + len(mvhd), b'moov') + mvhd
+    return struct.pack('>I4s', 16, b'ftyp') + b'isom' + bytes(4) + moov
+
+
+@pytest.fixture
+def add_video(app_module, make_user, monkeypatch, tmp_path):
+    monkeypatch.setitem(app_module.app.config, 'UPLOAD_FOLDER', str(tmp_path))
+
+    def add_video(data):
+        (tmp_path / 'clip.mp4').write_bytes(data)
+        with app_module.app.app_context():
+            video = app_module.Video(user_id=make_user(), title='clip', filename='clip.mp4', status='Processing')
+            app_module.db.session.add(video)
+            app_module.db.session.flush()
+            job = app_module.VideoJob(video_id=video.id)
+            app_module.db.session.add(job)
+            app_module.db.session.commit()
+            return video.id, job.id
+
+    return add_video
+
+
+def run_once(app_module, runner):
+    with app_module.app.app_context():
+        runner.run(once=True)
+
+
+def load(app_module, video_id, job_id):
+    with app_module.app.app_context():
+        video = app_module.db.session.get(app_module.Video, video_id)
+        job = app_module.db.session.get(app_module.VideoJob, job_id)
+        app_module.db.session.expunge_all()
+        return video, job
+
+
+def test_process_videos_once_publishes_the_video(app_module, add_video):
+    video_id, job_id = add_video(mp4(65))
+
+    result = app_module.app.test_cli_runner().invoke(args=['process-videos', '--once'])
+    assert result.exit_code == 0, result.output
+
+    video, job = load(app_module, video_id, job_id)
+    assert (job.status, job.progress, job.attempts, job.error) == ('done', 100, 1, None)
+    assert (video.status, video.duration) == ('Published', '1:05')
+
+
+def test_failed_jobs_are_retried_with_backoff_then_marked_failed(app_module, add_video):
+    video_id, job_id = add_video(b'not a video')
+    runner = app_module.VideoJobRunner(
+        workers=1, renditions=[], max_attempts=3, retry_seconds=30, timeout=60, poll_seconds=0.05
+    )
+
+    for attempt, backoff in ((1, 30), (2, 60)):
+        started = app_module.datetime.utcnow()
+        run_once(app_module, runner)
+        video, job = load(app_module, video_id, job_id)
+        assert (job.status, job.attempts) == ('queued', attempt)
+        assert 'MP4' in job.error
+        assert video.status == 'Processing'
+        # Not picked up again before the backoff has passed
+        assert backoff - 1 <= (job.run_after - started).total_seconds() <= backoff + 5
+        run_once(app_module, runner)
+        assert load(app_module, video_id, job_id)[1].attempts == attempt
+
+        with app_module.app.app_context():
+            app_module.VideoJob.query.filter_by(id=job_id).update({'run_after': app_module.datetime.utcnow()})
+            app_module.db.session.commit()
+
+    run_once(app_module, runner)
+    video, job = load(app_module, video_id, job_id)
+    assert (job.status, job.attempts) == ('failed', 3)
+    assert video.status == 'Failed'
+
+
+def test_jobs_of_a_dead_runner_and_videos_without_jobs_are_queued(app_module, add_video):
+    video_id, job_id = add_video(mp4(5))
+    runner = app_module.VideoJobRunner(
+        workers=1, renditions=[], max_attempts=3, retry_seconds=30, timeout=60, poll_seconds=0.05
+    )
+    with app_module.app.app_context():
+        app_module.VideoJob.query.filter_by(id=job_id).update({
+            'status': 'running',
+            'updated_at': app_module.datetime.utcnow() - app_module.timedelta(minutes=5)
+        })
+        orphan = app_module.Video(user_id=app_module.db.session.get(app_module.Video, video_id).user_id,
+                                  title='orphan', filename='clip.mp4', status='Processing')
+        app_module.db.session.add(orphan)
+        app_module.db.session.commit()
+
+        assert runner.requeue_stale() == 1
+        assert runner.enqueue_unprocessed() == 1
+
+    run_once(app_module, runner)
+    with app_module.app.app_context():
+        assert [job.status for job in app_module.VideoJob.query.order_by(app_module.VideoJob.id)] == ['done', 'done']
+        assert {video.status for video in app_module.Video.query} == {'Published'}
@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from conftest import BACKEND_DIR
+
+
+@pytest.fixture
+def video_id(app_module, make_user):
+    with app_module.app.app_context():
+        video = app_module.Video(user_id=make_user(), title='clip', filename='clip.mp4', status='Published', views=10)
+        app_module.db.session.add(video)
+        app_module.db.session.commit()
+        return video.id
+
+
+def stored_views(app_module, video_id):
+    with app_module.app.app_context():
+        return app_module.db.session.get(app_module.Video, video_id).views
+
+
+def test_pending_views_are_reported_and_then_flushed(app_module, client, video_id):
+    # The background flusher may write some of them meanwhile; the sum is what counts
+    reported = [client.get(f'/api/videos/{video_id}').get_json()['views'] for _ in range(3)]
+    assert reported == [11, 12, 13]
+    assert stored_views(app_module, video_id) + app_module.view_counter.pending(video_id) == 13
+
+    app_module.view_counter.flush()
+    assert app_module.view_counter.pending_total() == 0
+    assert stored_views(app_module, video_id) == 13
+    assert client.get(f'/api/videos/{video_id}').get_json()['views'] == 14
+
+
+def rename_table(app_module, old, new):
+    with app_module.app.app_context():
+        with app_module.db.engine.begin() as connection:
+            connection.exec_driver_sql(f'ALTER TABLE {old} RENAME TO {new}')
+
+
+def test_views_are_kept_when_a_flush_fails(app_module, video_id):
+    counter = app_module.ViewCounter(flush_seconds=3600, flush_threshold=1000)
+    counter.add(video_id)
+    counter.add(video_id)
+
+    rename_table(app_module, 'video', 'video_away')
+    with pytest.raises(Exception, match='no such table'):
+        counter.flush()
+    assert (counter.pending(video_id), counter.pending_total()) == (2, 2)
+
+    rename_table(app_module, 'video_away', 'video')
+    assert counter.flush() == 2
+    assert stored_views(app_module, video_id) == 12
+
+
+def test_views_pending_at_exit_are_written(tmp_path):
+    # A worker that exits before its next periodic flush still writes every view
+    database = tmp_path / 'views.db'
+    script = textwrap.dedent('''
+        import app
+        with app.app.app_context():
+            app.init_db()
+            user = app.User(username='viewer', email='viewer@example.com', password_hash='x')
+            app.db.session.add(user)
+            app.db.session.flush()
+            video = app.Video(user_id=user.id, title='clip', filename='clip.mp4', status='Published')
+            app.db.session.add(video)
+            app.db.session.commit()
+            video_id = video.id
+        client = app.app.test_client()
+        for _ in range(25):
+            assert client.get(f'/api/videos/{video_id}').status_code == 200
+    ''')
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, DATABASE_URL=f'sqlite:///{database}')
+    result = subprocess.run(
+        [sys.executable, '-c', script], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+
+    with sqlite3.connect(database) as connection:
+        assert connection.execute('SELECT views, trending_score FROM video').fetchall() == [(25, 25)]
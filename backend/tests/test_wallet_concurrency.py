@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+THREADS = 8
+OPERATIONS = 25
+
+
+def run_concurrently(target, count=THREADS):
+    # All threads start together so that their requests overlap
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def run(index):
+        barrier.wait()
+        try:
+            target(index)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def test_concurrent_adds_and_withdrawals_keep_the_ledger_and_balance_in_step(app_module, make_user, auth_headers):
+    me = make_user()
+    headers = auth_headers(me)
+    with app_module.app.app_context():
+        wallet = app_module.get_or_create_wallet(me, 5000)
+        app_module.db.session.add(app_module.Transaction(
+            user_id=me, wallet_id=wallet.id, amount_cents=5000, transaction_type='add', description='opening balance'
+        ))
+        app_module.db.session.commit()
+        wallet_id = wallet.id
+
+    balances = []
+    statuses = []
+
+    def operate(index):
+        client = app_module.app.test_client()
+        for i in range(OPERATIONS):
+            # Withdrawals outnumber deposits, so some of them find the wallet short
+            if (index + i) % 3:
+                response = client.post('/api/wallet/withdraw', json={'amount': 10}, headers=headers)
+            else:
+                response = client.post('/api/wallet/add', json={'amount': 5, 'payment_method': 'card'},
+                                       headers=headers)
+            statuses.append(response.status_code)
+            if response.status_code == 200:
+                balances.append(response.get_json()['balance'])
+
+    run_concurrently(operate)
+
+    assert set(statuses) <= {200, 400}
+    assert 400 in statuses
+    assert min(balances) >= 0
+    with app_module.app.app_context():
+        Transaction = app_module.Transaction
+        ledger = app_module.db.session.query(app_module.func.sum(app_module.db.case(
+            (Transaction.transaction_type == 'add', Transaction.amount_cents),
+            else_=-Transaction.amount_cents
+        ))).filter(Transaction.wallet_id == wallet_id).scalar()
+        balance = app_module.db.session.get(app_module.Wallet, wallet_id).balance_cents
+    assert balance >= 0
+    assert ledger == balance
+
+
+@pytest.mark.parametrize('seats', [1, 5])
+def test_concurrent_registrations_never_oversell_a_tournament(app_module, make_user, auth_headers, seats):
+    players = [make_user() for _ in range(THREADS * 3)]
+    with app_module.app.app_context():
+        tournament = app_module.Tournament(name='Cup', game='Valorant', entry_fee=5.0, max_participants=seats)
+        app_module.db.session.add(tournament)
+        for player in players:
+            app_module.get_or_create_wallet(player, 10000)
+        app_module.db.session.commit()
+        tournament_id = tournament.id
+
+    statuses = []
+
+    def register(index):
+        client = app_module.app.test_client()
+        for player in players[index::THREADS]:
+            response = client.post(f'/api/tournaments/{tournament_id}/register', headers=auth_headers(player))
+            statuses.append(response.status_code)
+
+    run_concurrently(register)
+
+    assert sorted(set(statuses)) == [200, 400]
+    with app_module.app.app_context():
+        tournament = app_module.db.session.get(app_module.Tournament, tournament_id)
+        registrations = app_module.TournamentRegistration.query.filter_by(tournament_id=tournament_id).count()
+        charged = app_module.Transaction.query.filter_by(transaction_type='tournament_entry').count()
+        assert tournament.current_participants == registrations == charged == seats
+        assert statuses.count(200) == seats
+        assert tournament.status == 'Registration Closed'
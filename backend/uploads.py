@@ -0,0 +1,67 @@
+import hashlib
+import os
+
+
+# File helpers for resumable uploads. Every chunk is written straight into the
+# final file at its own offset, so chunks can arrive in any order and in
+# parallel, and memory use is bounded by block_size whatever the file size.
+def create_part_file(path, size):
+    # A sparse file of the final size that the chunks are written into
+    with open(path, 'wb') as part:
+        part.truncate(size)
+
+
+def write_chunk(path, offset, stream, length, block_size=1024 * 1024):
+    # Copies up to `length` bytes from the request stream into the file at
+    # `offset`; returns (bytes written, sha256 hex digest of those bytes)
+    digest = hashlib.sha256()
+    written = 0
+    with open(path, 'r+b') as part:
+        part.seek(offset)
+        while written < length:
+            block = stream.read(min(block_size, length - written))
+            if not block:
+                break
+            part.write(block)
+            digest.update(block)
+            written += len(block)
+    return written, digest.hexdigest()
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        for block in iter(lambda: part.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class FileRange:
+    # A byte range of a file, for use as a WSGI response body. Servers that
+    # sendfile() take fileno() and the current offset (gunicorn sends exactly
+    # Content-Length bytes from there); others read() it, which stops at the
+    # end of the range.
+    def __init__(self, path, start, length):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._remaining = length
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
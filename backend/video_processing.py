@@ -0,0 +1,129 @@
+import os
+import shutil
+import struct
+import subprocess
+
+
+# CPU-heavy work for uploaded videos. process_video() runs in a worker process
+# of the video job runner (see `flask --app app process-videos`), never on a
+# request thread. ffmpeg/ffprobe are used when installed; without them the
+# duration is read from the MP4 header and no thumbnail or renditions are made.
+class ProcessingError(Exception):
+    pass
+
+
+def report(progress, job_id, percent):
+    if progress is not None:
+        progress.put((job_id, percent))
+
+
+def run(command, timeout):
+    try:
+        return subprocess.run(command, capture_output=True, check=True, timeout=timeout, text=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise ProcessingError(f'{command[0]} failed: {e.stderr.strip()[-500:]}')
+    except subprocess.TimeoutExpired:
+        raise ProcessingError(f'{command[0]} timed out after {timeout}s')
+
+
+def probe_duration(path, timeout):
+    if shutil.which('ffprobe'):
+        output = run([
+            'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+            '-of', 'default=noprint_wrappers=1:nokey=1', path
+        ], timeout)
+        try:
+            return float(output.strip())
+        except ValueError:
+            raise ProcessingError('ffprobe reported no duration')
+    return mp4_duration(path)
+
+
+def mp4_duration(path):
+    # Reads the movie header ("moov" > "mvhd") without loading the media data
+    with open(path, 'rb') as video:
+        for box_type, start, size in mp4_boxes(video, 0, os.path.getsize(path)):
+            if box_type != b'moov':
+                continue
+            for child_type, child_start, _ in mp4_boxes(video, start, start + size):
+                if child_type != b'mvhd':
+                    continue
+                video.seek(child_start)
+                version = video.read(4)[0]
+                if version == 1:
+                    timescale, duration = struct.unpack('>16xIQ', video.read(28))
+                else:
+                    timescale, duration = struct.unpack('>8xII', video.read(16))
+                if timescale:
+                    return duration / timescale
+    raise ProcessingError('Not an MP4 file with a movie header, and ffprobe is not installed')
+
+
+def mp4_boxes(video, start, end):
+    # Yields (type, payload offset, payload size) for the boxes in [start, end)
+    offset = start
+    while offset + 8 <= end:
+        video.seek(offset)
+        size, box_type = struct.unpack('>I4s', video.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', video.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield box_type, offset + header, size - header
+        offset += size
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f'{hours}:{minutes:02d}:{seconds:02d}' if hours else f'{minutes}:{seconds:02d}'
+
+
+def extract_thumbnail(path, output_path, at_seconds, timeout):
+    if not shutil.which('ffmpeg'):
+        return False
+    run([
+        'ffmpeg', '-y', '-v', 'error', '-ss', f'{at_seconds:.2f}', '-i', path,
+        '-frames:v', '1', '-vf', 'scale=640:-2', output_path
+    ], timeout)
+    return True
+
+
+def transcode(path, output_path, height, timeout):
+    run([
+        'ffmpeg', '-y', '-v', 'error', '-i', path, '-vf', f'scale=-2:{height}',
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23',
+        '-c:a', 'aac', '-movflags', '+faststart', output_path
+    ], timeout)
+
+
+def process_video(job_id, path, thumbnail_path, renditions, timeout, progress=None):
+    # Returns {'duration', 'thumbnail', 'renditions'}; paths in the result are
+    # the output files that were actually written
+    if not os.path.exists(path):
+        raise ProcessingError(f'{path} does not exist')
+    report(progress, job_id, 5)
+
+    duration = probe_duration(path, timeout)
+    report(progress, job_id, 20)
+
+    thumbnail = None
+    if extract_thumbnail(path, thumbnail_path, min(duration / 2, 3.0), timeout):
+        thumbnail = thumbnail_path
+    report(progress, job_id, 40)
+
+    written = []
+    if renditions and shutil.which('ffmpeg'):
+        stem, _ = os.path.splitext(path)
+        for done, height in enumerate(renditions, 1):
+            output_path = f'{stem}_{height}p.mp4'
+            transcode(path, output_path, height, timeout)
+            written.append((height, output_path))
+            report(progress, job_id, 40 + 55 * done // len(renditions))
+
+    return {'duration': format_duration(duration), 'thumbnail': thumbnail, 'renditions': written}
@@ -193,6 +193,9 @@ export function ChatInterface() {
     try {
       await fetch(`/api/chat/mark-read/${userId}`, {
         method: "POST",
+        headers: {
+          Authorization: `Bearer ${localStorage.getItem("token") || ""}`,
+        },
       })
     } catch (error) {
       console.error("Error marking messages as read:", error)